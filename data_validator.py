@@ -2,16 +2,1365 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, List, Dict
 import json
+import codecs
+import hashlib
+import io
 from datetime import datetime
 import os
 import re
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+from openpyxl import load_workbook
+from openpyxl.utils.datetime import from_excel
+from collections import deque, OrderedDict
+import copy
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from concurrent.futures.process import BrokenProcessPool
+
+# 普通号码与特别号码之间的分隔标记（按优先级排列）
+SPECIAL_MARKS = ['特', '+', '/', '|', '\\']
+# 匹配非ASCII数字（如全角数字），出现时回退到逐行解析以保证结果一致
+_NON_ASCII_DIGIT = re.compile(r'(?![0-9])\d')
+
+
+def _parse_draw_line(line: str):
+    """逐行解析一行文本，返回7个号码的列表，无法解析时返回None"""
+    line = line.strip()
+    if not line or len(line) < 10:  # 跳过空行和太短的行
+        return None
+
+    # 识别这一行是否包含预期的数据
+    if ':' in line:
+        # 按照冒号分割
+        parts = line.split(':')
+        if len(parts) >= 3:  # 期数:日期:号码
+            numbers_part = parts[-1]
+        elif len(parts) == 2:  # 期数:号码
+            numbers_part = parts[1]
+        else:
+            numbers_part = line
+    else:
+        numbers_part = line
+
+    # 查找分隔普通号码和特别号码的标记
+    special_mark = None
+    for mark in SPECIAL_MARKS:
+        if mark in numbers_part:
+            special_mark = mark
+            break
+
+    # 提取数字
+    if special_mark:
+        # 分割普通号码和特别号码
+        try:
+            normal_str, special_str = numbers_part.split(special_mark)
+            normal_numbers = [int(n) for n in re.findall(r'\d+', normal_str)]
+            special_number = int(re.findall(r'\d+', special_str)[0])
+            all_numbers = normal_numbers + [special_number]
+        except (ValueError, IndexError):
+            # 如果失败，尝试直接提取所有数字
+            all_numbers = [int(n) for n in re.findall(r'\d+', numbers_part)]
+    else:
+        all_numbers = [int(n) for n in re.findall(r'\d+', numbers_part)]
+
+    # 过滤有效的号码（1-49之间），我们期望有7个有效数字
+    valid_numbers = [n for n in all_numbers if 1 <= n <= 49]
+    if len(valid_numbers) >= 7:
+        return valid_numbers[:7]
+    return None
+
+
+# 依次尝试的文本编码（gb2312、windows-1252、ISO-8859-1 分别是 gbk、cp1252、latin1 的子集或别名）
+TEXT_ENCODINGS = ['utf-8', 'gbk', 'cp1252', 'latin1']
+
+
+def _decode_bytes(raw: bytes) -> Tuple[str, str]:
+    """在内存中一次性识别编码并解码，返回 (文本, 编码)"""
+    # 先根据BOM判断
+    if raw.startswith(codecs.BOM_UTF8):
+        return raw[len(codecs.BOM_UTF8):].decode('utf-8', errors='replace'), 'utf-8-sig'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return raw.decode('utf-16', errors='replace'), 'utf-16'
+
+    for encoding in TEXT_ENCODINGS:
+        try:
+            return raw.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    return raw.decode('latin1', errors='ignore'), 'latin1 (忽略错误)'
+
+
+def _split_lines(text: str) -> List[str]:
+    """按文本模式的换行规则（\\n、\\r、\\r\\n）拆分行"""
+    return re.split(r'\r\n|\r|\n', text)
+
+
+def _first_per_group(groups: np.ndarray) -> np.ndarray:
+    """对已排序的分组编号，标记每组的第一个元素"""
+    mask = np.ones(len(groups), dtype=bool)
+    mask[1:] = groups[1:] != groups[:-1]
+    return mask
+
+
+def _last_per_group(groups: np.ndarray) -> np.ndarray:
+    """对已排序的分组编号，标记每组的最后一个元素"""
+    mask = np.ones(len(groups), dtype=bool)
+    mask[:-1] = groups[1:] != groups[:-1]
+    return mask
+
+
+# 每期的元数据列：年份、期号、月、日（无法识别时为0）
+META_FIELDS = ['year', 'period', 'month', 'day']
+
+
+def _empty_meta(count: int) -> Dict[str, np.ndarray]:
+    """全部未知的元数据列"""
+    return {name: np.zeros(count, dtype=np.uint16) for name in META_FIELDS}
+
+
+def _meta_from_prefix(values: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """根据号码部分之前的前4个数字串推断年份、期号和日期
+
+    values/lengths 为 (M, 4) 数组，缺失的数字串长度为0。
+    如 2015年034期:03月27日 依次为年份、期号、月、日；首个数字串不是4位时视为没有年份。
+    """
+    rows = np.arange(len(values))
+    has_year = lengths[:, 0] == 4
+    shift = has_year.astype(np.int64)
+    period = values[rows, shift]
+    period_len = lengths[rows, shift]
+    month = values[rows, shift + 1]
+    day = values[rows, shift + 2]
+    has_date = ((lengths[rows, shift + 1] > 0) & (month >= 1) & (month <= 12)
+                & (lengths[rows, shift + 2] > 0) & (day >= 1) & (day <= 31))
+    return {
+        "year": np.where(has_year, values[:, 0], 0).astype(np.uint16),
+        "period": np.where((period_len > 0) & (period_len <= 4), period, 0).astype(np.uint16),
+        "month": np.where(has_date, month, 0).astype(np.uint16),
+        "day": np.where(has_date, day, 0).astype(np.uint16)
+    }
+
+
+def _parse_line_prefix(line: str) -> Tuple[List[int], List[int]]:
+    """逐行解析时提取号码部分之前的前4个数字串，返回 (数值, 长度)"""
+    line = line.strip()
+    prefix = line.rpartition(':')[0]
+    runs = re.findall(r'\d+', prefix)[:4]
+    values = [int(run) if len(run) <= 4 else 0 for run in runs]
+    lengths = [len(run) for run in runs]
+    padding = [0] * (4 - len(runs))
+    return values + padding, lengths + padding
+
+
+@lru_cache(maxsize=1)
+def _non_ascii_digit_prefixes() -> np.ndarray:
+    """所有非ASCII十进制数字UTF-8编码的前两个字节（65536位查找表）"""
+    table = np.zeros(1 << 16, dtype=bool)
+    chars = ''.join(map(chr, range(0x80, 0xD800))) + ''.join(map(chr, range(0xE000, 0x110000)))
+    for ch in re.findall(r'\d', chars):
+        encoded = ch.encode('utf-8')
+        table[encoded[0] << 8 | encoded[1]] = True
+    return table
+
+
+def _may_contain_non_ascii_digit(b: np.ndarray) -> bool:
+    """快速判断UTF-8缓冲区中是否可能包含非ASCII数字"""
+    lead = np.flatnonzero(b[:-1] >= 0xC0)
+    if len(lead) == 0:
+        return False
+    prefixes = (b[lead].astype(np.uint16) << 8) | b[lead + 1]
+    present = np.bincount(prefixes, minlength=1 << 16).astype(bool)
+    return bool((present & _non_ascii_digit_prefixes()).any())
+
+
+def _tokenize_draw_bytes(buf: bytes) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """对整个UTF-8缓冲区做向量化分词，返回 (N, 7) 的号码矩阵和每行的元数据
+
+    与逐行解析的规则完全一致：号码部分取最后一个冒号之后的内容，
+    按优先级寻找唯一的特别号码标记，普通号码加上标记后的第一个数字，
+    否则退回为号码部分中的全部数字；过滤1-49后取前7个。
+    号码部分之前的数字串用于识别年份、期号和日期。
+    """
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if len(b) == 0:
+        return np.empty((0, 7), dtype=np.int64), _empty_meta(0)
+
+    # 行边界（文本模式下 \n、\r 都视为换行）
+    newlines = np.flatnonzero((b == 10) | (b == 13))
+    num_lines = len(newlines) + 1
+
+    # 数字串的起止位置
+    digits = b - np.uint8(48)
+    padded = np.zeros(len(b) + 2, dtype=bool)
+    padded[1:-1] = digits < 10
+    starts = np.flatnonzero(padded[1:] > padded[:-1])
+    ends = np.flatnonzero(padded[1:] < padded[:-1])
+    if len(starts) == 0:
+        return np.empty((0, 7), dtype=np.int64), _empty_meta(0)
+    run_lines = np.searchsorted(newlines, starts)
+
+    # 只取末两位计算数值，更高位出现非零数字即超出1-49范围
+    lengths = ends - starts
+    values = digits[ends - 1].astype(np.int64)
+    two = np.flatnonzero(lengths >= 2)
+    values[two] += digits[ends[two] - 2] * 10
+    valid = (values >= 1) & (values <= 49)
+    long_runs = np.flatnonzero(valid & (lengths > 2))
+    if len(long_runs):
+        extra = lengths[long_runs] - 2
+        offsets = np.arange(extra.sum()) - np.repeat(np.cumsum(extra) - extra, extra)
+        high = digits[np.repeat(starts[long_runs], extra) + offsets] > 0
+        bounds = np.concatenate(([0], np.cumsum(extra)[:-1]))
+        valid[long_runs[np.logical_or.reduceat(high, bounds)]] = False
+
+    # 每行最后一个冒号的位置，号码部分在其之后
+    colons = np.flatnonzero(b == 58)
+    last_colon = np.full(num_lines, -1, dtype=np.int64)
+    if len(colons):
+        colon_lines = np.searchsorted(newlines, colons)
+        last = _last_per_group(colon_lines)
+        last_colon[colon_lines[last]] = colons[last]
+    in_numbers = starts > last_colon[run_lines]
+
+    # 按优先级确定每行使用的特别号码标记及其出现次数
+    mark_pos = np.full(num_lines, -1, dtype=np.int64)
+    mark_count = np.zeros(num_lines, dtype=np.int64)
+    for mark in SPECIAL_MARKS:
+        pattern = mark.encode('utf-8')
+        span = len(b) - len(pattern) + 1
+        if span <= 0 or pattern not in buf:
+            continue
+        hit = b[:span] == pattern[0]
+        for offset in range(1, len(pattern)):
+            hit &= b[offset:offset + span] == pattern[offset]
+        positions = np.flatnonzero(hit)
+        lines = np.searchsorted(newlines, positions)
+        keep = positions > last_colon[lines]
+        positions, lines = positions[keep], lines[keep]
+        if len(positions) == 0:
+            continue
+        counts = np.bincount(lines, minlength=num_lines)
+        first = _first_per_group(lines)
+        unresolved = mark_count[lines[first]] == 0
+        mark_pos[lines[first][unresolved]] = positions[first][unresolved]
+        fresh = mark_count == 0
+        mark_count[fresh] = counts[fresh]
+
+    # 标记唯一且其后存在数字时才按“普通号码+特别号码”拆分
+    after_mark = in_numbers & (mark_pos[run_lines] >= 0) & (starts > mark_pos[run_lines])
+    after_idx = np.flatnonzero(after_mark)
+    first_after = np.zeros(len(starts), dtype=bool)
+    first_after[after_idx[_first_per_group(run_lines[after_idx])]] = True
+    has_after = np.bincount(run_lines[after_idx], minlength=num_lines) > 0
+    split = (mark_count == 1) & has_after
+    line_split = split[run_lines]
+    keep = in_numbers & (~line_split | (starts < mark_pos[run_lines]) | first_after)
+
+    # 每行取前7个有效号码，不足7个的行丢弃
+    selected = np.flatnonzero(keep & valid)
+    sel_lines = run_lines[selected]
+    order = np.arange(len(selected))
+    rank = order - np.maximum.accumulate(np.where(_first_per_group(sel_lines), order, 0))
+    counts = np.bincount(sel_lines, minlength=num_lines)
+    take = (counts[sel_lines] >= 7) & (rank < 7)
+    draws = values[selected[take]].reshape(-1, 7)
+
+    # 号码部分之前的数字串（每行最多4个）用于识别年份、期号和日期
+    row_lines = sel_lines[take][::7]
+    row_of_line = np.full(num_lines, -1, dtype=np.int64)
+    row_of_line[row_lines] = np.arange(len(row_lines))
+    order = np.arange(len(starts))
+    run_rank = order - np.maximum.accumulate(np.where(_first_per_group(run_lines), order, 0))
+    prefix = np.flatnonzero(~in_numbers & (run_rank < 4))
+    prefix = prefix[row_of_line[run_lines[prefix]] >= 0]
+    prefix_values = np.zeros((len(row_lines), 4), dtype=np.int64)
+    prefix_lengths = np.zeros((len(row_lines), 4), dtype=np.int64)
+    full = np.zeros(len(prefix), dtype=np.int64)
+    for k in range(4):
+        pos = ends[prefix] - 1 - k
+        has = pos >= starts[prefix]
+        full[has] += digits[pos[has]].astype(np.int64) * 10 ** k
+    prefix_rows = row_of_line[run_lines[prefix]]
+    prefix_values[prefix_rows, run_rank[prefix]] = np.where(lengths[prefix] <= 4, full, 0)
+    prefix_lengths[prefix_rows, run_rank[prefix]] = lengths[prefix]
+    return draws, _meta_from_prefix(prefix_values, prefix_lengths)
+
+
+def _parse_draw_text(content: str, utf8: bytes = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """解析整个文本内容，返回 (N, 7) 的号码矩阵和每行的元数据
+
+    utf8 为内容对应的UTF-8字节（源文件本身就是UTF-8时可直接传入，省去一次编码）
+    """
+    buf = utf8 if utf8 is not None else content.encode('utf-8')
+    if (_may_contain_non_ascii_digit(np.frombuffer(buf, dtype=np.uint8))
+            and _NON_ASCII_DIGIT.search(content)):
+        # 包含全角等非ASCII数字，逐行解析以保持与 re 的 \d 语义一致
+        rows, prefix_values, prefix_lengths = [], [], []
+        for line in _split_lines(content):
+            row = _parse_draw_line(line)
+            if row is not None:
+                rows.append(row)
+                values, lengths = _parse_line_prefix(line)
+                prefix_values.append(values)
+                prefix_lengths.append(lengths)
+        meta = _meta_from_prefix(np.array(prefix_values, dtype=np.int64).reshape(-1, 4),
+                                 np.array(prefix_lengths, dtype=np.int64).reshape(-1, 4))
+        return np.array(rows, dtype=np.int64).reshape(-1, 7), meta
+    return _tokenize_draw_bytes(buf)
+
+
+# 解析结果缓存（与源文件同目录下的隐藏目录，每列一个 .npy 文件）
+SIDECAR_DIR = '.lottery_cache'
+SIDECAR_VERSION = 3
+SOURCE_TAIL_BYTES = 4096  # 追加导入时用于确认文件只在末尾增长的比对长度
+
+
+def _file_signature(file_path: str, hasher) -> Dict:
+    """源文件的缓存键：大小、修改时间和内容哈希（hasher 为已读入全部内容的 blake2b 对象）"""
+    stat = os.stat(file_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": hasher.hexdigest()
+    }
+
+
+def _sidecar_dir(file_path: str) -> str:
+    """源文件对应的缓存目录"""
+    file_path = os.path.abspath(file_path)
+    return os.path.join(os.path.dirname(file_path), SIDECAR_DIR, os.path.basename(file_path))
+
+
+def _read_sidecar(file_path: str, signature: Dict):
+    """读取与源文件匹配的缓存，返回 (列字典, 元数据)，各列以只读内存映射方式打开"""
+    meta_path = os.path.join(_sidecar_dir(file_path), 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != SIDECAR_VERSION or meta.get("source") != signature:
+            return None
+        columns = {}
+        for name, shape in meta["columns"].items():
+            array = np.load(os.path.join(_sidecar_dir(file_path), f"{name}.npy"), mmap_mode='r')
+            if list(array.shape) != shape:
+                return None
+            columns[name] = array
+        return columns, meta
+    except Exception as e:
+        print(f"读取缓存文件时出错：{str(e)}")
+        return None
+
+
+def _npy_header(dtype: np.dtype, shape: Tuple[int, ...]) -> bytes:
+    """生成 .npy 1.0 格式的文件头（行数可增长，头部长度与行数无关）"""
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": shape
+    })
+    return header.getvalue()
+
+
+class _SidecarWriter:
+    """逐块写入解析结果缓存：各列先写入临时文件，提交时改写文件头中的行数并写入元数据"""
+
+    def __init__(self, file_path: str):
+        self.cache_dir = _sidecar_dir(file_path)
+        self.meta_path = os.path.join(self.cache_dir, 'meta.json')
+        self._columns = {}  # 列名 → [文件, dtype, 每行形状, 行数]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+    def append(self, columns: Dict[str, np.ndarray]):
+        for name, array in columns.items():
+            array = np.ascontiguousarray(array)
+            if name not in self._columns:
+                f = open(os.path.join(self.cache_dir, f"{name}.tmp.npy"), 'wb')
+                f.write(_npy_header(array.dtype, (0,) + array.shape[1:]))
+                self._columns[name] = [f, array.dtype, array.shape[1:], 0]
+            column = self._columns[name]
+            column[0].write(array.astype(column[1], copy=False).tobytes())
+            column[3] += len(array)
+
+    def commit(self, signature: Dict, **extra):
+        shapes = {}
+        for name, (f, dtype, row_shape, rows) in self._columns.items():
+            header = _npy_header(dtype, (rows,) + row_shape)
+            f.seek(0)
+            if len(header) != len(_npy_header(dtype, (0,) + row_shape)):
+                raise ValueError("缓存文件头长度发生变化")
+            f.write(header)
+            f.close()
+            os.replace(f.name, os.path.join(self.cache_dir, f"{name}.npy"))
+            shapes[name] = [rows] + list(row_shape)
+        meta = {"version": SIDECAR_VERSION, "source": signature, "columns": shapes}
+        meta.update(extra)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def abort(self):
+        for f, _, _, _ in self._columns.values():
+            f.close()
+            if os.path.exists(f.name):
+                os.remove(f.name)
+
+
+def _write_sidecar_chunks(file_path: str, signature: Dict, chunks, **extra) -> bool:
+    """逐块写入解析结果缓存，chunks 为列字典的可迭代对象，内存占用只与单块大小有关
+
+    元数据文件最后写入，存在即表示缓存完整；没有任何行时不写入缓存。
+    """
+    writer = None
+    try:
+        writer = _SidecarWriter(file_path)
+        rows = 0
+        for columns in chunks:
+            writer.append(columns)
+            rows += len(columns["draws"])
+        if rows == 0:
+            writer.abort()
+            return False
+        writer.commit(signature, **extra)
+        return True
+    except Exception as e:
+        print(f"写入缓存文件时出错：{str(e)}")
+        if writer is not None:
+            writer.abort()
+        return False
+
+
+def _write_sidecar(file_path: str, signature: Dict, columns: Dict[str, np.ndarray], **extra) -> bool:
+    """写入解析结果缓存，元数据文件最后写入，存在即表示缓存完整"""
+    return _write_sidecar_chunks(file_path, signature, [columns], **extra)
+
+
+def _append_sidecar(file_path: str, signature: Dict, rows: Dict[str, np.ndarray]) -> bool:
+    """把新增的行追加到已有缓存的各列文件末尾，并更新元数据
+
+    只改写 .npy 文件头中的行数（头部长度不变时），不重写已有内容。
+    """
+    cache_dir = _sidecar_dir(file_path)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != SIDECAR_VERSION or set(meta["columns"]) != set(rows):
+            return False
+        # 先删除元数据，中途失败时缓存自动失效
+        os.remove(meta_path)
+        for name, new_rows in rows.items():
+            with open(os.path.join(cache_dir, f"{name}.npy"), 'r+b') as f:
+                version = np.lib.format.read_magic(f)
+                if version != (1, 0):
+                    return False
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                header_length = f.tell()
+                new_rows = np.ascontiguousarray(new_rows, dtype=dtype)
+                if fortran_order or shape[1:] != new_rows.shape[1:]:
+                    return False
+                new_shape = (shape[0] + len(new_rows),) + shape[1:]
+                header = _npy_header(dtype, new_shape)
+                if len(header) != header_length:
+                    return False
+                f.seek(0, os.SEEK_END)
+                f.write(new_rows.tobytes())
+                f.seek(0)
+                f.write(header)
+            meta["columns"][name] = list(new_shape)
+        meta["source"] = signature
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return True
+    except Exception as e:
+        print(f"追加缓存文件时出错：{str(e)}")
+        return False
+
+
+# 流式解析（大文件分块读取，内存占用只与块大小有关）
+STREAM_CHUNK_BYTES = 1 << 20  # 每次读取的字节数（解析时的临时数组约为块大小的数十倍）
+STREAM_CHUNK_ROWS = 1 << 20  # 对内存中的号码矩阵分块统计时每块的行数
+STREAM_THRESHOLD_BYTES = 256 << 20  # 超过此大小的TXT文件导入时使用流式解析
+
+
+def _scan_file(file_path: str, chunk_bytes: int = STREAM_CHUNK_BYTES):
+    """分块读取整个文件，返回 (内容哈希对象, 文件大小, 末尾字节)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    size = 0
+    tail = b''
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            hasher.update(block)
+            size += len(block)
+            tail = (tail + block)[-SOURCE_TAIL_BYTES:]
+    return hasher, size, tail
+
+
+def _detect_file_encoding(file_path: str, chunk_bytes: int = STREAM_CHUNK_BYTES) -> str:
+    """分块识别文件编码，规则与 _decode_bytes 相同"""
+    with open(file_path, 'rb') as f:
+        head = f.read(len(codecs.BOM_UTF8))
+        if head.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        f.seek(0)
+        # 所有候选编码同时增量解码，出错的依次淘汰，剩下的第一个即为结果
+        decoders = {encoding: codecs.getincrementaldecoder(encoding)() for encoding in TEXT_ENCODINGS}
+        while len(decoders) > 1:
+            block = f.read(chunk_bytes)
+            for encoding, decoder in list(decoders.items()):
+                try:
+                    decoder.decode(block, final=not block)
+                except UnicodeDecodeError:
+                    del decoders[encoding]
+            if not block:
+                break
+    return next(encoding for encoding in TEXT_ENCODINGS if encoding in decoders)
+
+
+def iter_draw_chunks(file_path: str, encoding: str = None, chunk_bytes: int = STREAM_CHUNK_BYTES):
+    """逐块解析TXT文件，依次产生 (号码矩阵, 元数据)，每块只包含完整的行
+
+    号码矩阵为 (n, 7) 的uint8数组，元数据格式与导入时相同；所有块拼接后与一次性解析的结果一致。
+    """
+    if encoding is None:
+        encoding = _detect_file_encoding(file_path, chunk_bytes)
+    # 带BOM的文件与一次性解码时一样替换无法解码的字节
+    errors = 'replace' if encoding in ('utf-8-sig', 'utf-16') else 'strict'
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    pending = ''
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            text = pending + decoder.decode(block, final=not block)
+            if block:
+                # 在最后一个换行处截断，不完整的行留到下一块
+                cut = max(text.rfind('\n'), text.rfind('\r')) + 1
+                text, pending = text[:cut], text[cut:]
+            if text:
+                draws, meta = _parse_draw_text(text)
+                if len(draws):
+                    yield draws.astype(np.uint8), meta
+            if not block:
+                break
+
+
+# 多进程解析（按换行对齐的字节范围分发给工作进程）
+PARALLEL_THRESHOLD_BYTES = 16 << 20  # 超过此大小的TXT文件默认使用多进程解析
+
+
+def _newline_aligned_ranges(file_path: str, size: int, range_bytes: int) -> List[Tuple[int, int]]:
+    """把文件切分为约 range_bytes 大小的字节范围，每个范围都在换行符之后结束"""
+    bounds = [0]
+    with open(file_path, 'rb') as f:
+        pos = range_bytes
+        while pos < size:
+            f.seek(pos)
+            while True:
+                block = f.read(1 << 16)
+                if not block:
+                    pos = size
+                    break
+                hits = [i for i in (block.find(b'\n'), block.find(b'\r')) if i >= 0]
+                if hits:
+                    pos += min(hits) + 1
+                    break
+                pos += len(block)
+            if pos < size:
+                bounds.append(pos)
+            pos += range_bytes
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_byte_range(file_path: str, start: int, end: int, encoding: str):
+    """工作进程中解析文件的 [start, end) 字节范围，返回 (uint8号码矩阵, 元数据)"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        block = f.read(end - start)
+    if encoding == 'utf-8':
+        draws, meta = _parse_draw_text(block.decode('utf-8'), block)
+    elif encoding == 'utf-8-sig':
+        # 与一次性解码相同：去掉开头的BOM，无法解码的字节替换
+        draws, meta = _parse_draw_text(block.decode('utf-8-sig' if start == 0 else 'utf-8', errors='replace'))
+    else:
+        draws, meta = _parse_draw_text(block.decode(encoding))
+    return draws.astype(np.uint8), meta
+
+
+def iter_draw_chunks_parallel(file_path: str, encoding: str, workers: int = None,
+                              chunk_bytes: int = STREAM_CHUNK_BYTES):
+    """多进程逐块解析TXT文件，按文件顺序产生 (号码矩阵, 元数据)，结果与 iter_draw_chunks 完全一致
+
+    范围边界都在换行处，因此只支持换行符为单字节的编码（不支持 utf-16）；
+    同时在途的范围不超过工作进程数的两倍，内存占用仍与块大小有关。
+    """
+    if encoding == 'utf-16':
+        raise ValueError("utf-16 文件不能按字节范围切分")
+    workers = workers or os.cpu_count() or 1
+    ranges = _newline_aligned_ranges(file_path, os.path.getsize(file_path), chunk_bytes)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, end in ranges:
+            pending.append(executor.submit(_parse_byte_range, file_path, start, end, encoding))
+            if len(pending) >= 2 * workers:
+                draws, meta = pending.popleft().result()
+                if len(draws):
+                    yield draws, meta
+        while pending:
+            draws, meta = pending.popleft().result()
+            if len(draws):
+                yield draws, meta
+
+
+def _iter_row_chunks(array: np.ndarray, rows: int = STREAM_CHUNK_ROWS):
+    """按行分块遍历数组（对内存映射的数据只逐块读入）"""
+    for start in range(0, len(array), rows):
+        yield array[start:start + rows]
+
+
+def _count_numbers(draws: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """号码计数：返回 (全部号码, 每列, 特别号码) 的出现次数，数组下标即号码（下标0不用）
+
+    数组长度为50；数据中有大于49的数值时加长到最大值+1，这些数值同样计入。
+    每列的计数通过一次 bincount 得到（第 c 列的号码偏移 width*c），按行分块处理。
+    """
+    columns = draws.shape[1]
+    width = max(50, int(draws.max()) + 1) if draws.size else 50
+    offsets = (np.arange(columns) * width).astype(np.uint16)
+    per_column = np.zeros(columns * width, dtype=np.int64)
+    for chunk in _iter_row_chunks(draws):
+        per_column += np.bincount((chunk.astype(np.uint16) + offsets).ravel(), minlength=columns * width)
+    per_column = per_column.reshape(columns, width)
+    return per_column.sum(axis=0), per_column, per_column[6]
+
+
+# 分析结果缓存最多保留的结果数，0 表示不缓存
+ANALYSIS_CACHE_SIZE = 16
+
+_VALID_NUMBERS = frozenset(range(1, 50))
+
+# snapshot() 可以包含的数据指纹和派生表，默认全部包含
+SNAPSHOT_TABLES = ("fingerprint", "count_prefix", "features", "omission", "cooccurrence", "bitsets")
+
+# 一次追加超过此行数时重新统计遗漏，而不是逐期更新
+OMISSION_REBUILD_ROWS = 4096
+
+# 共现计数每隔多少行保存一个累计检查点；一次追加不超过 COOCCURRENCE_DIRECT_ROWS 行时逐期更新
+COOCCURRENCE_BLOCK_ROWS = 4096
+COOCCURRENCE_DIRECT_ROWS = 64
+
+# 前缀计数表的内存上限，超过时按区间直接统计
+PREFIX_TABLE_MAX_BYTES = 256 << 20
+
+
+def _build_count_prefix(draws: np.ndarray) -> np.ndarray:
+    """每列的前缀计数表：(N+1, 列数, 50)，table[i, c, v] 为前 i 行第 c+1 列中号码 v 的出现次数
+
+    任意 [start, end) 区间的计数为 table[end] - table[start]。
+    """
+    n, columns = draws.shape
+    table = np.zeros((n + 1, columns, 50), dtype=np.uint32)
+    rows = np.arange(1, n + 1)
+    for col in range(columns):
+        table[rows, col, draws[:, col]] = 1
+    np.cumsum(table, axis=0, out=table)
+    return table
+
+
+def _first_occurrence_order(values: np.ndarray) -> np.ndarray:
+    """按第一次出现的顺序返回 values 中出现过的号码
+
+    从开头起逐步扩大扫描范围，所有号码都出现后即停止，通常只需扫描很少的行。
+    """
+    present = np.count_nonzero(np.bincount(values)) if len(values) else 0
+    size = 512
+    while True:
+        numbers, index = np.unique(values[:size], return_index=True)
+        if len(numbers) == present or size >= len(values):
+            return numbers[np.argsort(index)]
+        size *= 8
+
+
+# 组合模式查找表（覆盖uint8全部取值）：奇数、大号（大于25）、所在区间（1-10、11-20、21-30、31-40、其余）
+_ODD_LUT = (np.arange(256) % 2).astype(np.uint8)
+_BIG_LUT = (np.arange(256) > 25).astype(np.uint8)
+_ZONE_LUT = np.array([0 if 1 <= x <= 10 else 1 if 11 <= x <= 20 else 2 if 21 <= x <= 30 else 3 if 31 <= x <= 40 else 4
+                      for x in range(256)], dtype=np.uint8)
+# 区间分布的整数编码：5个区间的个数按8进制各占一位（每行最多7个号码）
+_ZONE_WEIGHTS = 8 ** np.arange(4, -1, -1, dtype=np.uint16)
+
+# 每期号码的位集：第 n 位表示号码 n（1-49），超出范围的号码不计入
+_NUMBER_BITS = np.uint64(((1 << 50) - 1) ^ 1)
+_POPCOUNT_LUT = np.array([bin(x).count('1') for x in range(256)], dtype=np.uint8)
+
+# 批量查找相似期时每块的 候选数×行数 上限
+SIMILAR_BLOCK_CELLS = 1 << 22
+
+# 每期特征表：和值、跨度、奇数个数、大号个数、各区间个数、各尾数个数（均按全部7个号码计算）
+FEATURE_COLUMNS = {
+    "sum": ((), np.uint16),
+    "span": ((), np.uint8),
+    "odd": ((), np.uint8),
+    "big": ((), np.uint8),
+    "zones": ((5,), np.uint8),
+    "tails": ((10,), np.uint8)
+}
+FEATURE_CHUNK_ROWS = 1 << 16
+# 生肖特征的列顺序，最后一列为映射中没有的号码
+ZODIAC_NAMES = ['鼠', '牛', '虎', '兔', '龙', '蛇', '马', '羊', '猴', '鸡', '狗', '猪', '未知']
+
+
+def _draw_features(draws: np.ndarray) -> Dict[str, np.ndarray]:
+    """计算每期的特征列，按行分块查表"""
+    features = {name: np.empty((len(draws),) + shape, dtype=dtype)
+                for name, (shape, dtype) in FEATURE_COLUMNS.items()}
+    pos = 0
+    for chunk in _iter_row_chunks(draws, FEATURE_CHUNK_ROWS):
+        end = pos + len(chunk)
+        features["sum"][pos:end] = chunk.sum(axis=1, dtype=np.uint16)
+        features["span"][pos:end] = chunk.max(axis=1) - chunk.min(axis=1)
+        features["odd"][pos:end] = _ODD_LUT[chunk].sum(axis=1)
+        features["big"][pos:end] = _BIG_LUT[chunk].sum(axis=1)
+        features["zones"][pos:end] = (_ZONE_LUT[chunk][:, :, None] == np.arange(5)).sum(axis=1)
+        features["tails"][pos:end] = ((chunk % 10)[:, :, None] == np.arange(10)).sum(axis=1)
+        pos = end
+    return features
+
+
+def _draw_bitsets(draws: np.ndarray) -> np.ndarray:
+    """每期号码的位集：(N,) uint64，按行分块计算"""
+    bitsets = np.empty(len(draws), dtype=np.uint64)
+    pos = 0
+    for chunk in _iter_row_chunks(draws, FEATURE_CHUNK_ROWS):
+        valid = (chunk >= 1) & (chunk <= 49)
+        bits = np.where(valid, np.left_shift(np.uint64(1), np.where(valid, chunk, 0).astype(np.uint64)), np.uint64(0))
+        bitsets[pos:pos + len(chunk)] = np.bitwise_or.reduce(bits, axis=1)
+        pos += len(chunk)
+    return bitsets
+
+
+def _numbers_mask(numbers) -> np.uint64:
+    """号码集合对应的位集"""
+    mask = 0
+    for number in numbers:
+        if 1 <= int(number) <= 49:
+            mask |= 1 << int(number)
+    return np.uint64(mask)
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    """位集中号码的个数；没有 np.bitwise_count 的 NumPy 版本按字节查表"""
+    masks = np.ascontiguousarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks)
+    return _POPCOUNT_LUT[masks.view(np.uint8)].reshape(masks.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def _overlap_histograms(bitsets: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """每个候选位集与各期相同号码个数的分布：(候选数, 8)，[i, k] 为与第 i 个候选恰有 k 个相同号码的期数
+
+    按 候选数×行数 不超过 SIMILAR_BLOCK_CELLS 分块，每块做一次位与和位计数。
+    """
+    masks = np.asarray(masks, dtype=np.uint64)
+    histograms = np.zeros((len(masks), 8), dtype=np.int64)
+    rows = max(SIMILAR_BLOCK_CELLS // max(len(masks), 1), 1)
+    for block in _iter_row_chunks(bitsets, rows):
+        overlaps = _popcount(masks[:, None] & block[None, :])
+        if len(block) >= len(masks):
+            # 每块行数较多时逐个候选 bincount，否则加上候选偏移一次 bincount
+            histograms += np.stack([np.bincount(row, minlength=8) for row in overlaps])
+        else:
+            keys = overlaps.astype(np.int32) + (8 * np.arange(len(masks), dtype=np.int32))[:, None]
+            histograms += np.bincount(keys.ravel(), minlength=8 * len(masks)).reshape(-1, 8)
+    return histograms
+
+
+def _neighbour_mask(bitsets: np.ndarray) -> np.ndarray:
+    """与位集中某个号码相差1的号码（1-49）"""
+    return ((bitsets << np.uint64(1)) | (bitsets >> np.uint64(1))) & _NUMBER_BITS
+
+
+def _count_distribution(counts: np.ndarray) -> Dict[int, int]:
+    """{个数: 期数}，按个数从小到大，只包含出现过的个数"""
+    histogram = np.bincount(counts)
+    return {int(count): int(histogram[count]) for count in np.flatnonzero(histogram)}
+
+
+def _zodiac_lut(mapping: Dict) -> np.ndarray:
+    """号码 → ZODIAC_NAMES 中的序号（与 get_number_zodiac 的查找方式相同）"""
+    unknown = len(ZODIAC_NAMES) - 1
+    return np.array([ZODIAC_NAMES.index(mapping[n]) if mapping.get(n) in ZODIAC_NAMES else unknown
+                     for n in range(256)], dtype=np.uint8)
+
+
+def _zodiac_counts(draws: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """每期各生肖的号码个数：(N, 13)"""
+    counts = np.empty((len(draws), len(ZODIAC_NAMES)), dtype=np.uint8)
+    pos = 0
+    for chunk in _iter_row_chunks(draws, FEATURE_CHUNK_ROWS):
+        counts[pos:pos + len(chunk)] = (lut[chunk][:, :, None] == np.arange(len(ZODIAC_NAMES))).sum(axis=1)
+        pos += len(chunk)
+    return counts
+
+
+def _tally_keys(keys: np.ndarray) -> List[Tuple[int, int]]:
+    """统计整数编码的模式，按第一次出现的顺序返回 [(编码, 次数)]"""
+    counts = np.bincount(keys)
+    order = _first_occurrence_order(keys)
+    return list(zip(order.tolist(), counts[order].tolist()))
+
+
+def _run_lengths(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """游程编码：返回每段连续相同值的 (值, 起始下标, 长度)"""
+    values = np.asarray(values)
+    if len(values) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return values[:0], empty, empty
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(values)))
+    return values[starts], starts, lengths
+
+
+def _run_patterns(values: np.ndarray, labels=None) -> Dict:
+    """由游程编码汇总连续出现模式
+
+    连续出现次数：每个值（至少连续出现2次）的最长连续期数，按第一次连续出现的顺序排列；
+    连续长度分布：{连续期数: 段数}。labels 把值转换为显示用的键（如生肖名）。
+    """
+    run_values, _, lengths = _run_lengths(values)
+    repeated = lengths > 1
+    keys = run_values[repeated].astype(np.int64)
+    longest = {}
+    if len(keys):
+        # 同一值的各段中取最长，键按该值第一次连续出现的顺序
+        best = np.zeros(int(keys.max()) + 1, dtype=np.int64)
+        np.maximum.at(best, keys, lengths[repeated])
+        for key in _first_occurrence_order(keys).tolist():
+            longest[labels[key] if labels is not None else key] = int(best[key])
+    histogram = np.bincount(lengths)
+    return {
+        "连续出现次数": longest,
+        "最长连续": int(lengths.max()),
+        "连续长度分布": {int(length): int(histogram[length]) for length in np.flatnonzero(histogram)}
+    }
+
+
+def _counts_to_dict(counts: np.ndarray, order: np.ndarray) -> Dict[int, int]:
+    """把计数数组转换为 {号码: 次数} 字典，键按 order 的顺序排列"""
+    return dict(zip(order.tolist(), counts[order].tolist()))
+
+
+def _check_draw_chunks(chunks, offset: int = 0) -> Dict[str, np.ndarray]:
+    """逐块检查号码范围和每行的重复号码，offset 为第一块的起始行
+
+    每行只排序一次：排序后首尾即最小、最大号码，相邻相等即有重复。返回 columns（超出范围的列标记）、
+    out_of_range（含超出范围号码的行）和 duplicates（含重复号码的行）。
+    """
+    columns = np.zeros(7, dtype=bool)
+    out_of_range = []
+    duplicates = []
+    for draws in chunks:
+        ordered = np.sort(draws, axis=1)
+        bad = (ordered[:, 0] < 1) | (ordered[:, -1] > 49)
+        if bad.any():
+            columns |= ((draws[bad] < 1) | (draws[bad] > 49)).any(axis=0)
+            out_of_range.append(np.flatnonzero(bad) + offset)
+        duplicates.append(np.flatnonzero((np.diff(ordered, axis=1) == 0).any(axis=1)) + offset)
+        offset += len(draws)
+    return {
+        "columns": columns,
+        "out_of_range": np.concatenate(out_of_range) if out_of_range else np.empty(0, dtype=np.int64),
+        "duplicates": np.concatenate(duplicates) if duplicates else np.empty(0, dtype=np.int64)
+    }
+
+
+def _merge_checks(first: Dict[str, np.ndarray], second: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """合并前后两段行的检查结果"""
+    return {
+        "columns": first["columns"] | second["columns"],
+        "out_of_range": np.concatenate((first["out_of_range"], second["out_of_range"])),
+        "duplicates": np.concatenate((first["duplicates"], second["duplicates"]))
+    }
+
+
+def _check_errors(check: Dict[str, np.ndarray]) -> List[str]:
+    """检查结果对应的错误信息，与 validate_data 相同"""
+    errors = [f"第{col+1}列包含超出范围(1-49)的数值" for col in np.flatnonzero(check["columns"])]
+    return errors + [f"第{idx+1}行包含重复的号码" for idx in check["duplicates"].tolist()]
+
+
+# 批量区间分析：每个任务包含的区间数（工作进程按任务领取，结果为紧凑数组）
+BATCH_TASK_RANGES = 256
+
+_batch_draws = None  # 工作进程中附加的号码矩阵（共享内存或内存映射，不复制）
+_batch_shm = None
+
+
+def _mapped_file(array: np.ndarray) -> str:
+    """array 从头开始映射自某个 .npy 文件时返回文件路径，否则返回 None"""
+    base = array
+    while base is not None and not isinstance(base, np.memmap):
+        base = getattr(base, 'base', None)
+    if base is None or not getattr(base, 'filename', None) or not base.filename.endswith('.npy'):
+        return None
+    if base.__array_interface__['data'][0] != array.__array_interface__['data'][0]:
+        return None
+    return base.filename
+
+
+def _attach_batch_draws(kind: str, name: str, shape: Tuple[int, int]):
+    """工作进程初始化：附加到共享内存（kind='shm'）或内存映射缓存文件（kind='mmap'）中的号码矩阵"""
+    global _batch_draws, _batch_shm
+    if kind == 'mmap':
+        _batch_draws = np.load(name, mmap_mode='r')[:shape[0]]
+        return
+    # 共享内存由主进程创建和释放（工作进程与主进程共用同一个资源回收进程）
+    _batch_shm = shared_memory.SharedMemory(name=name)
+    _batch_draws = np.ndarray(shape, dtype=np.uint8, buffer=_batch_shm.buf)
+
+
+def _summarize_ranges(draws: np.ndarray, ranges: np.ndarray) -> Dict[str, np.ndarray]:
+    """统计每个区间 [start, end) 的号码出现次数和特征，返回按区间排列的紧凑数组"""
+    count = len(ranges)
+    result = {
+        "counts": np.zeros((count, 49), dtype=np.int32),
+        "special": np.zeros((count, 49), dtype=np.int32),
+        "sum_mean": np.zeros(count),
+        "span_mean": np.zeros(count),
+        "odd": np.zeros(count, dtype=np.int64),
+        "big": np.zeros(count, dtype=np.int64)
+    }
+    for i, (start, end) in enumerate(ranges.tolist()):
+        rows = draws[start:end]
+        if len(rows) == 0:
+            continue
+        result["counts"][i] = np.bincount(rows.ravel(), minlength=50)[1:50]
+        result["special"][i] = np.bincount(rows[:, 6], minlength=50)[1:50]
+        result["sum_mean"][i] = rows.sum(axis=1, dtype=np.int64).mean()
+        result["span_mean"][i] = (rows.max(axis=1) - rows.min(axis=1)).mean()
+        result["odd"][i] = _ODD_LUT[rows].sum(dtype=np.int64)
+        result["big"][i] = _BIG_LUT[rows].sum(dtype=np.int64)
+    return result
+
+
+def _summarize_batch(ranges: np.ndarray) -> Dict[str, np.ndarray]:
+    """工作进程任务：在附加的号码矩阵上统计一批区间"""
+    return _summarize_ranges(_batch_draws, ranges)
+
+
+class _OmissionTracker:
+    """号码遗漏统计
+
+    记录每个号码的出现期数、首次和最近一次出现的行，以及相邻两次出现之间遗漏的期数
+    （个数、总和、平方和、最大、最小）。初始化时对号码矩阵做一次 argsort/diff，
+    之后每追加一期只更新该期出现的号码。
+    """
+
+    def __init__(self, draws: np.ndarray):
+        self.rows = len(draws)
+        flat = np.asarray(draws).ravel()
+        # 稳定排序后同一号码的出现按行号递增排列，同一行内重复的号码只保留一次
+        order = np.argsort(flat, kind='stable')
+        numbers = flat[order].astype(np.int64)
+        rows = order // max(draws.shape[1], 1)
+        keep = np.ones(len(numbers), dtype=bool)
+        keep[1:] = (numbers[1:] != numbers[:-1]) | (rows[1:] != rows[:-1])
+        numbers, rows = numbers[keep], rows[keep]
+        
+        self.hits = np.bincount(numbers, minlength=50)[:50].astype(np.int64)
+        ends = np.cumsum(self.hits)
+        present = self.hits > 0
+        self.first = np.full(50, -1, dtype=np.int64)
+        self.last = np.full(50, -1, dtype=np.int64)
+        self.first[present] = rows[(ends - self.hits)[present]]
+        self.last[present] = rows[ends[present] - 1]
+        
+        same = numbers[1:] == numbers[:-1]
+        gap_numbers = numbers[1:][same]
+        gaps = (rows[1:] - rows[:-1] - 1)[same]
+        self.gap_count = np.bincount(gap_numbers, minlength=50)[:50].astype(np.int64)
+        self.gap_sum = np.bincount(gap_numbers, weights=gaps, minlength=50)[:50]
+        self.gap_square = np.bincount(gap_numbers, weights=gaps.astype(np.float64) ** 2, minlength=50)[:50]
+        self.gap_max = np.zeros(50, dtype=np.int64)
+        self.gap_min = np.zeros(50, dtype=np.int64)
+        has_gap = self.gap_count > 0
+        if has_gap.any():
+            # 遗漏已按号码分组，每组取最大、最小
+            group_starts = (np.cumsum(self.gap_count) - self.gap_count)[has_gap]
+            self.gap_max[has_gap] = np.maximum.reduceat(gaps, group_starts)
+            self.gap_min[has_gap] = np.minimum.reduceat(gaps, group_starts)
+
+    def append(self, draws: np.ndarray):
+        """追加若干期，每期只更新出现的号码"""
+        for row in draws.tolist():
+            for num in set(row) & _VALID_NUMBERS:
+                last = self.last[num]
+                if last >= 0:
+                    gap = self.rows - last - 1
+                    if self.gap_count[num] == 0:
+                        self.gap_max[num] = self.gap_min[num] = gap
+                    else:
+                        self.gap_max[num] = max(self.gap_max[num], gap)
+                        self.gap_min[num] = min(self.gap_min[num], gap)
+                    self.gap_count[num] += 1
+                    self.gap_sum[num] += gap
+                    self.gap_square[num] += gap * gap
+                else:
+                    self.first[num] = self.rows
+                self.last[num] = self.rows
+                self.hits[num] += 1
+            self.rows += 1
+
+    def stats(self) -> Dict[str, np.ndarray]:
+        """各号码的遗漏统计（下标即号码）
+
+        当前遗漏为最近一次出现之后的期数（从未出现为总期数）；最大遗漏同时考虑数据开头到首次出现
+        以及当前的遗漏；平均遗漏和遗漏标准差只统计相邻两次出现之间的遗漏。
+        """
+        present = self.hits > 0
+        current = np.where(present, self.rows - 1 - self.last, self.rows)
+        leading = np.where(present, self.first, self.rows)
+        count = np.maximum(self.gap_count, 1)
+        mean = np.where(self.gap_count > 0, self.gap_sum / count, 0.0)
+        variance = np.where(self.gap_count > 0, self.gap_square / count - mean ** 2, 0.0)
+        return {
+            "hits": self.hits.copy(),
+            "current": current,
+            "max": np.maximum(self.gap_max, np.maximum(leading, current)),
+            "mean": mean,
+            "std": np.sqrt(np.maximum(variance, 0.0)),
+            "gap_count": self.gap_count.copy(),
+            "gap_max": self.gap_max.copy(),
+            "gap_min": self.gap_min.copy()
+        }
+
+
+def _omission_history(draws: np.ndarray) -> Dict[str, np.ndarray]:
+    """每一期之后各号码的遗漏统计：(N, 49) 数组，第 k 行第 i-1 列为前 k+1 期中号码 i 的统计
+
+    current、max 为 int32，mean、std 为 float32，口径与 _OmissionTracker.stats 相同
+    （最后一行即全部数据的 current、max、mean、std）。按行分块计算，块之间只传递每个号码
+    最近一次出现的行、最大遗漏以及遗漏的个数、总和、平方和。
+    """
+    n = len(draws)
+    history = {"current": np.empty((n, 49), dtype=np.int32), "max": np.empty((n, 49), dtype=np.int32),
+               "mean": np.empty((n, 49), dtype=np.float32), "std": np.empty((n, 49), dtype=np.float32)}
+    last = np.full(49, -1, dtype=np.int64)
+    running_max = np.zeros(49, dtype=np.int64)
+    count = np.zeros(49, dtype=np.int64)
+    total = np.zeros(49, dtype=np.float64)
+    square = np.zeros(49, dtype=np.float64)
+    for begin in range(0, n, FEATURE_CHUNK_ROWS):
+        chunk = draws[begin:begin + FEATURE_CHUNK_ROWS]
+        size = len(chunk)
+        hit = np.zeros((size, 256), dtype=bool)
+        hit[np.arange(size)[:, None], chunk] = True
+        # 块内按 (号码, 行) 排列，沿行累积时访问连续内存
+        hit = np.ascontiguousarray(hit[:, 1:50].T)
+        rows = np.arange(begin, begin + size, dtype=np.int64)
+        # 每期之后最近一次出现的行（从未出现为-1，当前遗漏统一为 行号 - 最近出现的行）
+        latest = np.maximum.accumulate(np.where(hit, rows, -1), axis=1)
+        np.maximum(latest, last[:, None], out=latest)
+        previous = np.hstack([last[:, None], latest[:, :-1]])
+        current = rows - latest
+        maximum = np.maximum.accumulate(current, axis=1)
+        np.maximum(maximum, running_max[:, None], out=maximum)
+        # 出现时结束一段遗漏：长度为距上次出现的期数
+        closed = hit & (previous >= 0)
+        gaps = np.where(closed, rows - previous - 1, 0).astype(np.float64)
+        counts = np.cumsum(closed, axis=1) + count[:, None]
+        sums = np.cumsum(gaps, axis=1) + total[:, None]
+        squares = np.cumsum(gaps ** 2, axis=1) + square[:, None]
+        mean = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        variance = np.divide(squares, counts, out=np.zeros_like(squares), where=counts > 0) - mean ** 2
+
+        section = slice(begin, begin + size)
+        history["current"][section] = current.T
+        history["max"][section] = maximum.T
+        history["mean"][section] = mean.T
+        history["std"][section] = np.sqrt(np.maximum(variance, 0.0)).T
+        last, running_max = latest[:, -1], maximum[:, -1]
+        count, total, square = counts[:, -1], sums[:, -1], squares[:, -1]
+    return history
+
+
+def _pair_counts(draws: np.ndarray) -> np.ndarray:
+    """号码两两同时出现的期数：(49, 49)，[i-1, j-1] 为号码 i、j 同期出现的次数，对角线为号码出现的期数
+
+    每期编码为49位的0/1行 X，按行分块累加 X.T @ X（单精度在块内精确，累加为整数）。
+    """
+    pairs = np.zeros((49, 49), dtype=np.int64)
+    for chunk in _iter_row_chunks(draws, FEATURE_CHUNK_ROWS):
+        # 超出范围的号码归入第0、50列后丢弃
+        onehot = np.zeros((len(chunk), 51), dtype=np.float32)
+        onehot[np.arange(len(chunk))[:, None], np.minimum(chunk, 50)] = 1
+        onehot = onehot[:, 1:50]
+        pairs += np.rint(onehot.T @ onehot).astype(np.int64)
+    return pairs
+
+
+def _top_partners(pairs: np.ndarray, k: int) -> Dict[int, List[Tuple[int, int]]]:
+    """每个号码同期出现次数最多的 k 个号码（次数相同时号码小的在前），{号码: [(号码, 次数), ...]}"""
+    others = pairs.astype(np.int64)
+    np.fill_diagonal(others, -1)
+    order = np.argsort(-others, axis=1, kind='stable')[:, :k]
+    return {num + 1: [(int(other) + 1, int(pairs[num, other])) for other in order[num]]
+            for num in range(49)}
+
+
+class _CooccurrenceTable:
+    """号码共现计数：全部数据的 (49, 49) 计数，以及每 COOCCURRENCE_BLOCK_ROWS 行一个的累计计数检查点
+
+    区间查询由两个检查点相减，再补上不足一块的行；追加数据时只累加新增的行，
+    少量行时每期只更新该期号码两两对应的格子。
+    """
+
+    def __init__(self, draws: np.ndarray):
+        self.rows = 0
+        self.total = np.zeros((49, 49), dtype=np.int64)
+        self.checkpoints = _GrowableArray(np.zeros((1, 49, 49), dtype=np.uint32))
+        self.append(draws)
+
+    def append(self, draws: np.ndarray):
+        pos = 0
+        while pos < len(draws):
+            # 每段不跨越检查点
+            take = min(COOCCURRENCE_BLOCK_ROWS - self.rows % COOCCURRENCE_BLOCK_ROWS, len(draws) - pos)
+            block = draws[pos:pos + take]
+            if take <= COOCCURRENCE_DIRECT_ROWS:
+                for row in block.tolist():
+                    numbers = np.array(sorted(set(row) & _VALID_NUMBERS)) - 1
+                    self.total[np.ix_(numbers, numbers)] += 1
+            else:
+                self.total += _pair_counts(block)
+            self.rows += take
+            pos += take
+            if self.rows % COOCCURRENCE_BLOCK_ROWS == 0:
+                self.checkpoints.append(self.total[None].astype(np.uint32))
+
+    def state(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(检查点, 全部数据的计数) 的只读副本，供 DatasetSnapshot 使用"""
+        return self.checkpoints.view, self.total.copy()
+
+
+def _cooccurrence_range(draws: np.ndarray, checkpoints: np.ndarray, total: np.ndarray,
+                        start: int, end: int) -> np.ndarray:
+    """由检查点计算第 [start, end) 行的共现计数"""
+    def cumulative(row):
+        if row == len(draws):
+            return total
+        block = row // COOCCURRENCE_BLOCK_ROWS
+        return checkpoints[block].astype(np.int64) + _pair_counts(draws[block * COOCCURRENCE_BLOCK_ROWS:row])
+    return cumulative(end) - cumulative(start)
+
+
+class _GrowableArray:
+    """可按行追加的数组：容量不足时成倍扩容，view 始终是前 n 行的连续视图"""
+
+    def __init__(self, initial: np.ndarray):
+        self._buffer = initial
+        self._size = len(initial)
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._buffer[:self._size]
+
+    def append(self, rows: np.ndarray):
+        needed = self._size + len(rows)
+        if needed > len(self._buffer) or not self._buffer.flags.writeable:
+            # 只读的内存映射或容量不足时复制到新的可写缓冲区
+            capacity = max(needed, 2 * self._size, 1024)
+            buffer = np.empty((capacity,) + self._buffer.shape[1:], dtype=self._buffer.dtype)
+            buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = buffer
+        self._buffer[self._size:needed] = rows
+        self._size = needed
+
+
+def _frame_to_draws(frame: pd.DataFrame) -> Tuple[np.ndarray, str]:
+    """把7列整数DataFrame转换为uint8号码矩阵，返回 (矩阵, 错误信息)"""
+    if len(frame.columns) != 7:
+        return None, f"列数不正确：期望7列，实际{len(frame.columns)}列"
+    for i, col in enumerate(frame.columns):
+        if not pd.api.types.is_numeric_dtype(frame[col]):
+            return None, f"第{i+1}列包含非数字数据"
+    values = frame.to_numpy(dtype=np.float64)
+    if np.isnan(values).any():
+        return None, "数据中包含空值"
+    if len(values) and (values.min() < 0 or values.max() > 255 or (values != np.floor(values)).any()):
+        return None, "数据中包含超出范围(1-49)的数值"
+    return values.astype(np.uint8), None
+
+
+# Excel导入时按表头识别的期号列和日期列
+EXCEL_PERIOD_HEADERS = ('期',)
+EXCEL_DATE_HEADERS = ('日期', '时间', 'date')
+EXCEL_BATCH_ROWS = 1 << 16  # 逐行读取时每批转换为数组的行数
+
+
+def _excel_cell_meta(period, date, epoch: datetime) -> Tuple[int, int, int, int]:
+    """从期号单元格和日期单元格中提取 (年份, 期号, 月, 日)，无法识别的部分为0"""
+    year = period_no = month = day = 0
+    if isinstance(period, float) and period.is_integer():
+        period = int(period)
+    if isinstance(period, (int, str)) and not isinstance(period, bool):
+        text = str(period).strip()
+        if text.isascii() and text.isdigit() and len(text) in (6, 7, 8) and text[:2] in ('19', '20'):
+            # 2024001 这类年份与期号连写的期号
+            year, period_no = int(text[:4]), int(text[4:])
+        else:
+            runs = re.findall(r'[0-9]+', text)[:2]
+            if len(runs) == 2 and len(runs[0]) == 4:
+                year, period_no = int(runs[0]), int(runs[1])
+            elif runs and len(runs[0]) <= 4:
+                period_no = int(runs[0])
+    if isinstance(date, (int, float)) and not isinstance(date, bool) and 0 < date < 2958466:
+        # 未按日期格式读取的单元格是日期序号
+        date = from_excel(date, epoch)
+    if isinstance(date, datetime):
+        date_parts = [date.year, date.month, date.day]
+    elif isinstance(date, str):
+        runs = re.findall(r'[0-9]+', date)[:3]
+        date_parts = [int(run) for run in runs] if len(runs) == 3 and len(runs[0]) == 4 else []
+    else:
+        date_parts = []
+    if date_parts and 1 <= date_parts[1] <= 12 and 1 <= date_parts[2] <= 31:
+        year = year or date_parts[0]
+        month, day = date_parts[1], date_parts[2]
+    if period_no > 9999:
+        period_no = 0
+    return year, period_no, month, day
+
+
+def _read_excel_draws(source) -> Tuple[np.ndarray, List, Dict[str, np.ndarray], str]:
+    """用 openpyxl 的只读、仅取值模式逐行读取第一个工作表，返回 (uint8号码矩阵, 列名, 元数据, 错误信息)"""
+    workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        # 不依赖文件中记录的表格范围（缺失时 openpyxl 会额外完整扫描一遍）
+        sheet.reset_dimensions()
+        rows = enumerate(sheet.iter_rows(values_only=True), start=1)
+        return _collect_excel_draws(rows, workbook.epoch)
+    finally:
+        workbook.close()
+
+
+def _collect_excel_draws(rows, epoch: datetime) -> Tuple[np.ndarray, List, Dict[str, np.ndarray], str]:
+    """把逐行的单元格值收集为号码矩阵和元数据
+
+    第一行为表头；表头含“期”的列作为期号，含“日期”的列作为开奖日期，其余列正好7列时全部作为号码，
+    多于7列时取第一行数据中前7个数字列。全空的行会被跳过。
+    """
+    rows = ((number, values) for number, values in rows if any(value is not None for value in values))
+    first_number, first = next(rows, (None, None))
+    header = []
+    if first_number == 1:
+        # 表头中的整数（如1-7）按整数作为列名
+        header = [int(value) if isinstance(value, float) and value.is_integer() else value for value in first]
+        first_number, first = next(rows, (None, None))
+    header += [None] * (len(first or ()) - len(header))
+    
+    def find_column(keywords):
+        for i, label in enumerate(header):
+            if isinstance(label, str) and any(keyword in label.lower() for keyword in keywords):
+                return i
+        return None
+    period_col = find_column(EXCEL_PERIOD_HEADERS)
+    date_col = find_column(EXCEL_DATE_HEADERS)
+    candidates = [i for i in range(len(header)) if i not in (period_col, date_col)]
+    if len(candidates) > 7 and first is not None:
+        numeric = [i for i in candidates
+                   if isinstance(first[i], (int, float)) and not isinstance(first[i], bool)]
+        if len(numeric) >= 7:
+            candidates = numeric
+    if len(candidates) < 7:
+        return None, None, None, f"列数不正确：期望7列，实际{len(candidates)}列"
+    number_cols = candidates[:7]
+    labels = [header[i] for i in number_cols]
+    
+    pick_numbers = itemgetter(*number_cols)
+    has_meta = period_col is not None or date_col is not None
+    width = len(header)
+    parts, meta_rows, batch = [], [], []
+    for _, row in chain([(first_number, first)] if first is not None else [], rows):
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        batch.append(pick_numbers(row))
+        if has_meta:
+            meta_rows.append(_excel_cell_meta(row[period_col] if period_col is not None else None,
+                                              row[date_col] if date_col is not None else None, epoch))
+        if len(batch) >= EXCEL_BATCH_ROWS:
+            part, error = _excel_batch_to_draws(batch)
+            if part is None:
+                return None, None, None, error
+            parts.append(part)
+            batch = []
+    part, error = _excel_batch_to_draws(batch)
+    if part is None:
+        return None, None, None, error
+    parts.append(part)
+    
+    draws = np.concatenate(parts)
+    if has_meta:
+        columns = np.array(meta_rows, dtype=np.int64).reshape(-1, 4)
+        meta = {name: columns[:, i].astype(np.uint16) for i, name in enumerate(META_FIELDS)}
+    else:
+        meta = _empty_meta(len(draws))
+    return draws, labels, meta, None
+
+
+def _excel_batch_to_draws(batch: List[tuple]) -> Tuple[np.ndarray, str]:
+    """把一批号码单元格的值转换为uint8矩阵，错误信息与 _frame_to_draws 相同
+
+    空单元格（包括没有缓存结果的公式）记为0，导入后由 validate_data() 报告为超出范围，
+    与原先用 pandas 读取后再校验的行为一致。
+    """
+    types = set(map(type, chain.from_iterable(batch)))
+    if not types <= {int, float, type(None)}:
+        for col in range(7):
+            column_types = {type(row[col]) for row in batch}
+            if column_types - {int, float, type(None)}:
+                return None, f"第{col+1}列包含非数字数据"
+    if type(None) in types:
+        batch = [tuple(0 if value is None else value for value in row) for row in batch]
+    values = np.array(batch, dtype=np.float64).reshape(-1, 7)
+    values[np.isnan(values)] = 0
+    if len(values) and (values.min() < 0 or values.max() > 255 or (values != np.floor(values)).any()):
+        return None, "数据中包含超出范围(1-49)的数值"
+    return values.astype(np.uint8), None
+
 
 class LotteryDataAnalyzer:
     def __init__(self):
         self.valid_range = range(1, 50)
-        self.data = None
         self.analysis_results = {}
         self.zodiac_mapping = {}  # 存储生肖映射
+        self.use_sidecar_cache = True  # 是否在源文件旁缓存解析结果
+        self.parallel_threshold = PARALLEL_THRESHOLD_BYTES  # 超过此字节数的TXT文件多进程解析，None 表示关闭
+        self.parallel_workers = None  # 多进程解析的进程数，None 表示CPU核数
+        self._source_chunks = None  # 最近一次导入的TXT文件原始内容（追加导入时按块累积）
+        self.source_encoding = None
+        self._source_path = None  # 以下记录已解析到的位置，用于追加导入
+        self._source_hasher = None
+        self._source_size = 0
+        self._source_tail = b''
+        self.loaded_files = []  # 当前数据来自的文件（合并多个文件时按登记顺序）
+        self._catalog = {}  # 合并分析的文件 → (文件状态, 只加载该文件的分析器)
+        self.cache_size = ANALYSIS_CACHE_SIZE  # 分析结果缓存的容量，0 表示不缓存
+        self._lock = threading.RLock()  # 保护号码矩阵、派生表和缓存的替换与追加
+        # 号码矩阵、元数据和所有派生表的初始状态
+        self._set_draws(None)
         # 自动加载默认生肖映射文件
         if os.path.exists("zodiac_mapping.json"):
             try:
@@ -21,161 +1370,745 @@ class LotteryDataAnalyzer:
                 print(f"加载默认生肖映射文件时出错：{str(e)}")
 
         
-    def load_data(self, file_path: str) -> Tuple[bool, str]:
-        """加载数据文件（支持Excel、TXT和特定格式文本）"""
-        try:
-            # 保存最后加载的文件路径
-            self.last_loaded_file = file_path
-            
-            if file_path.lower().endswith('.xlsx'):
-                # 读取Excel文件
-                self.data = pd.read_excel(file_path, engine='openpyxl')
-                print(f"从Excel加载了 {len(self.data)} 行数据")
-            elif file_path.lower().endswith('.txt'):
-                # 以二进制方式读取，避免编码问题
-                parsed_data = []
-                
-                # 支持的编码列表，增加ANSI编码（实际是Windows-1252或cp1252）
-                encodings = ['utf-8', 'gbk', 'gb2312', 'cp1252', 'windows-1252', 'latin1', 'ISO-8859-1']
-                lines = None
-                encoding_used = None
-                
-                # 尝试所有可能的编码
-                for encoding in encodings:
-                    try:
-                        with open(file_path, 'r', encoding=encoding) as f:
-                            lines = f.readlines()
-                            encoding_used = encoding
-                            print(f"使用 {encoding} 成功读取了 {len(lines)} 行原始数据")
-                            break
-                    except UnicodeDecodeError:
-                        continue
-                
-                # 如果所有编码都失败，尝试二进制读取
-                if lines is None:
-                    try:
-                        with open(file_path, 'rb') as f:
-                            binary_content = f.read()
-                        
-                        # 尝试使用错误忽略模式
-                        content = binary_content.decode('latin1', errors='ignore')
-                        lines = content.splitlines()
-                        encoding_used = 'latin1 (忽略错误)'
-                        print(f"使用 {encoding_used} 读取了 {len(lines)} 行原始数据")
-                    except Exception as e:
-                        return False, f"无法读取文件: {str(e)}"
-                
-                # 解析每一行数据
-                for line in lines:
-                    line = line.strip()
-                    if not line or len(line) < 10:  # 跳过空行和太短的行
-                        continue
-                    
-                    try:
-                        # 识别这一行是否包含预期的数据
-                        if ':' in line:
-                            # 按照冒号分割
-                            parts = line.split(':')
-                            if len(parts) >= 3:  # 期数:日期:号码
-                                numbers_part = parts[-1]
-                            elif len(parts) == 2:  # 期数:号码
-                                numbers_part = parts[1]
-                            else:
-                                numbers_part = line
-                        else:
-                            numbers_part = line
-                        
-                        # 查找分隔普通号码和特别号码的标记
-                        special_mark = None
-                        for mark in ['特', '+', '/', '|', '\\']:
-                            if mark in numbers_part:
-                                special_mark = mark
-                                break
-                        
-                        # 提取数字
-                        all_numbers = []
-                        if special_mark:
-                            # 分割普通号码和特别号码
-                            try:
-                                normal_str, special_str = numbers_part.split(special_mark)
-                                # 提取普通号码
-                                normal_numbers = [int(n) for n in re.findall(r'\d+', normal_str)]
-                                # 提取特别号码
-                                special_number = int(re.findall(r'\d+', special_str)[0])
-                                # 组合所有号码
-                                all_numbers = normal_numbers + [special_number]
-                            except:
-                                # 如果失败，尝试直接提取所有数字
-                                all_numbers = [int(n) for n in re.findall(r'\d+', numbers_part)]
-                        else:
-                            # 直接提取所有数字
-                            all_numbers = [int(n) for n in re.findall(r'\d+', numbers_part)]
-                        
-                        # 过滤有效的号码（1-49之间）
-                        valid_numbers = [n for n in all_numbers if 1 <= n <= 49]
-                        
-                        # 我们期望有7个有效数字
-                        if len(valid_numbers) >= 7:
-                            row_data = valid_numbers[:7]
-                            parsed_data.append(row_data)
-                    except Exception as e:
-                        print(f"解析行时出错: {line}, 错误: {str(e)}")
-                        continue
-                
-                print(f"成功解析了 {len(parsed_data)} 行数据")
-                
-                # 创建DataFrame
-                if parsed_data:
-                    self.data = pd.DataFrame(parsed_data)
-                    # 重命名列
-                    self.data.columns = range(len(self.data.columns))
-                else:
-                    return False, f"未能从文件中解析出有效数据 (尝试使用编码: {encoding_used})"
+    def load_data(self, file_path: str) -> Tuple[bool, str]:
+        """加载数据文件（支持Excel、TXT和特定格式文本）
+
+        首次解析后会在源文件旁写入缓存，文件未变化时再次导入直接映射缓存。
+        """
+        try:
+            # 保存最后加载的文件路径
+            self.last_loaded_file = file_path
+            self.loaded_files = [file_path]
+            self._catalog = {}
+            self._source_chunks = None
+            self.source_encoding = None
+            self._source_path = None
+            
+            if not file_path.lower().endswith(('.xlsx', '.txt')):
+                return False, "不支持的文件格式，请使用.xlsx或.txt文件"
+            
+            # 很大的TXT文件分块解析，不把整个文件读入内存
+            try:
+                if (file_path.lower().endswith('.txt')
+                        and os.path.getsize(file_path) > STREAM_THRESHOLD_BYTES):
+                    return self._load_text_stream(file_path)
+                # 只读取一次文件，缓存校验和解析都使用这份内容
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+            except OSError as e:
+                return False, f"无法读取文件: {str(e)}"
+            hasher = hashlib.blake2b(raw, digest_size=16)
+            signature = _file_signature(file_path, hasher)
+            
+            cached = _read_sidecar(file_path, signature) if self.use_sidecar_cache else None
+            if cached is not None:
+                columns, meta = cached
+                # 直接使用只读内存映射，不做复制
+                self._set_draws(columns["draws"], meta["labels"],
+                                {name: columns[name] for name in META_FIELDS})
+                self._source_chunks = [raw] if file_path.lower().endswith('.txt') else None
+                self.source_encoding = meta.get("encoding")
+                print(f"从缓存加载了 {len(self.draws)} 行数据")
+            elif file_path.lower().endswith('.xlsx'):
+                # 以只读方式逐行读取Excel，号码直接写入矩阵，期号和日期列写入元数据
+                draws, labels, excel_meta, error = _read_excel_draws(io.BytesIO(raw))
+                if draws is None:
+                    self._set_draws(None)
+                    return False, f"数据格式不正确：{error}"
+                print(f"从Excel加载了 {len(draws)} 行数据")
+                if not all(isinstance(label, (int, str)) for label in labels):
+                    labels = list(range(7))
+                self._set_draws(draws, labels, excel_meta)
+                if self.use_sidecar_cache:
+                    _write_sidecar(file_path, signature, dict(self.meta, draws=self.draws), labels=labels)
+            else:
+                # 在内存中识别编码并解码
+                content, encoding_used = _decode_bytes(raw)
+                print(f"使用 {encoding_used} 成功读取了 {content.count(chr(10)) + 1} 行原始数据")
+                
+                # 保留原始字节和编码，后续查找期数时不再读取磁盘
+                self._source_chunks = [raw]
+                self.source_encoding = encoding_used
+                
+                # 对整个缓冲区做一次性解析，大文件分给多个进程
+                if self._use_parallel(len(raw), encoding_used):
+                    parts = list(self._iter_file_chunks(file_path, len(raw), encoding_used))
+                    parsed_data = np.concatenate([draws for draws, _ in parts] or [np.empty((0, 7), np.uint8)])
+                    parsed_meta = {name: np.concatenate([meta[name] for _, meta in parts] or [np.empty(0, np.uint16)])
+                                   for name in META_FIELDS}
+                else:
+                    parsed_data, parsed_meta = _parse_draw_text(content, raw if encoding_used == 'utf-8' else None)
+                print(f"成功解析了 {len(parsed_data)} 行数据")
+                
+                # 保存为紧凑的uint8号码矩阵，期号和日期保存在平行的元数据列中
+                if len(parsed_data):
+                    self._set_draws(parsed_data, meta=parsed_meta)
+                    if self.use_sidecar_cache:
+                        _write_sidecar(file_path, signature, dict(self.meta, draws=self.draws),
+                                       labels=self.column_labels, encoding=encoding_used)
+                else:
+                    return False, f"未能从文件中解析出有效数据 (尝试使用编码: {encoding_used})"
+            
+            # 验证数据是否成功加载
+            if self.draws is None or len(self.draws) == 0:
+                return False, "未能加载数据或数据为空"
+                
+            # 记录已解析到的字节位置，之后可以只解析新增的行
+            self._source_path = file_path
+            self._source_hasher = hasher
+            self._source_size = len(raw)
+            self._source_tail = raw[-SOURCE_TAIL_BYTES:]
+            
+            print(f"数据加载完成，共 {len(self.draws)} 行")
+            return True, f"数据加载成功，共 {len(self.draws)} 行"
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return False, f"数据加载失败：{str(e)}"
+    
+    def _load_text_stream(self, file_path: str) -> Tuple[bool, str]:
+        """分块解析大TXT文件：解析结果逐块写入缓存后以内存映射方式打开，峰值内存只与块大小有关"""
+        hasher, size, tail = _scan_file(file_path)
+        signature = _file_signature(file_path, hasher)
+        
+        cached = _read_sidecar(file_path, signature) if self.use_sidecar_cache else None
+        if cached is None:
+            encoding = _detect_file_encoding(file_path)
+            print(f"使用 {encoding} 分块解析文件")
+            chunks = ((dict(meta, draws=draws)) for draws, meta in self._iter_file_chunks(file_path, size, encoding))
+            if self.use_sidecar_cache and _write_sidecar_chunks(file_path, signature, chunks,
+                                                                labels=list(range(7)), encoding=encoding):
+                cached = _read_sidecar(file_path, signature)
+        if cached is not None:
+            columns, meta = cached
+            self._set_draws(columns["draws"], meta["labels"],
+                            {name: columns[name] for name in META_FIELDS})
+            encoding = meta.get("encoding")
+        else:
+            # 缓存不可用时在内存中拼接各块（只保留最终的uint8矩阵）
+            parts = list(self._iter_file_chunks(file_path, size, encoding))
+            if not parts:
+                return False, f"未能从文件中解析出有效数据 (尝试使用编码: {encoding})"
+            self._set_draws(np.concatenate([draws for draws, _ in parts]),
+                            meta={name: np.concatenate([meta[name] for _, meta in parts])
+                                  for name in META_FIELDS})
+        
+        self.source_encoding = encoding
+        self._source_path = file_path
+        self._source_hasher = hasher
+        self._source_size = size
+        self._source_tail = tail
+        print(f"数据加载完成，共 {len(self.draws)} 行")
+        return True, f"数据加载成功，共 {len(self.draws)} 行"
+    
+    def _use_parallel(self, size: int, encoding: str) -> bool:
+        """文件是否大到值得多进程解析"""
+        return (self.parallel_threshold is not None and size > self.parallel_threshold
+                and encoding != 'utf-16' and (self.parallel_workers or os.cpu_count() or 1) > 1)
+    
+    def _iter_file_chunks(self, file_path: str, size: int, encoding: str):
+        """逐块解析文件，超过阈值时使用多进程；无法启动工作进程时退回单进程解析"""
+        if not self._use_parallel(size, encoding):
+            yield from iter_draw_chunks(file_path, encoding)
+            return
+        yielded = False
+        try:
+            for chunk in iter_draw_chunks_parallel(file_path, encoding, self.parallel_workers):
+                yielded = True
+                yield chunk
+        except (OSError, BrokenProcessPool) as e:
+            if yielded:
+                raise
+            print(f"多进程解析失败，改用单进程解析：{str(e)}")
+            yield from iter_draw_chunks(file_path, encoding)
+    
+    def add_data_files(self, file_paths: List[str]) -> Tuple[bool, str]:
+        """登记多个数据文件并合并分析（如按年份保存的文件）
+
+        各文件单独解析并使用各自的解析缓存，已登记且未变化的文件不会重新解析；
+        合并后按 (年份, 期号) 排序，同一期在多个文件中出现时只保留一行（没有年份的行不去重）。
+        """
+        if not self._catalog:
+            # 从单文件模式切换时，已导入的文件作为第一个成员
+            self._catalog = {os.path.abspath(path): None for path in self.loaded_files
+                             if self._source_path == path}
+        for file_path in file_paths:
+            file_path = os.path.abspath(file_path)
+            if file_path not in self._catalog:
+                self._catalog[file_path] = None
+        return self.refresh_catalog()
+    
+    def remove_data_file(self, file_path: str) -> Tuple[bool, str]:
+        """从合并分析的文件中移除一个文件"""
+        file_path = os.path.abspath(file_path)
+        if file_path not in self._catalog:
+            return False, f"文件未登记：{file_path}"
+        del self._catalog[file_path]
+        if not self._catalog:
+            self._set_draws(None)
+            self.loaded_files = []
+            return True, "已移除全部数据文件"
+        return self.refresh_catalog(remerge=True)
+    
+    @property
+    def catalog_files(self) -> List[str]:
+        """合并分析的文件列表"""
+        return list(self._catalog)
+    
+    def refresh_catalog(self, remerge: bool = False) -> Tuple[bool, str]:
+        """重新检查各登记文件：未变化的直接使用已解析的结果，末尾有新增的只解析新增部分，然后重新合并
+
+        所有文件都未变化时不重新合并（除非 remerge 为 True）。
+        """
+        errors = []
+        changed = remerge
+        for file_path, member in list(self._catalog.items()):
+            try:
+                stat = os.stat(file_path)
+            except OSError as e:
+                errors.append(f"{os.path.basename(file_path)}: 无法读取文件: {str(e)}")
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            if member is not None and member[0] == state:
+                continue
+            changed = True
+            if member is not None:
+                analyzer = member[1]
+                success, message = analyzer.append_new_data()
+            else:
+                analyzer = LotteryDataAnalyzer()
+                analyzer.use_sidecar_cache = self.use_sidecar_cache
+                analyzer.parallel_threshold = self.parallel_threshold
+                analyzer.parallel_workers = self.parallel_workers
+                success, message = analyzer.load_data(file_path)
+            if success:
+                self._catalog[file_path] = (state, analyzer)
+            else:
+                self._catalog[file_path] = None
+                errors.append(f"{os.path.basename(file_path)}: {message}")
+        
+        members = [member[1] for member in self._catalog.values() if member is not None]
+        if not changed and self.draws is not None and not errors:
+            return True, f"没有新增数据，共 {len(self.draws)} 行"
+        if not members:
+            self._set_draws(None)
+            return False, "未能加载数据文件：\n" + "\n".join(errors)
+        total, duplicates = self._merge_members(members)
+        self.loaded_files = [path for path, member in self._catalog.items() if member is not None]
+        self.last_loaded_file = self.loaded_files[-1]
+        self._source_path = None
+        message = f"已合并 {len(members)} 个文件，共 {len(self.draws)} 行"
+        if duplicates:
+            message += f"（去除重复期号 {duplicates} 行）"
+        if errors:
+            message += "\n以下文件加载失败：\n" + "\n".join(errors)
+        print(message)
+        return True, message
+    
+    def _merge_members(self, members: List['LotteryDataAnalyzer']) -> Tuple[int, int]:
+        """按期号顺序合并各文件的数据并去除重复的期，返回 (合并前行数, 去除的行数)
+
+        只有年份和期号都已知的行参与去重：不同年份的文件可能只写期号（如“001期”），
+        这些行无法判断是否为同一期，全部保留。
+        """
+        draws = np.concatenate([member.draws for member in members])
+        meta = {name: np.concatenate([member.meta[name] for member in members]) for name in META_FIELDS}
+        keys = meta["year"].astype(np.int64) * 10000 + meta["period"]
+        dated = (meta["year"] > 0) & (meta["period"] > 0)
+        if len(keys) and dated.all():
+            # 稳定排序：同一期保留先登记的文件中的行，重复的期排序后相邻
+            order = np.argsort(keys, kind='stable')
+            keep = np.ones(len(order), dtype=bool)
+            keep[1:] = keys[order[1:]] != keys[order[:-1]]
+            rows = order[keep]
+        else:
+            # 部分行没有年份或期号时保持登记顺序，只去除年份和期号都相同的行
+            seen = set()
+            rows = [row for row, (key, known) in enumerate(zip(keys.tolist(), dated.tolist()))
+                    if not known or not (key in seen or seen.add(key))]
+        labels = members[0].column_labels
+        if any(member.column_labels != labels for member in members):
+            labels = None
+        self._set_draws(draws[rows], labels, {name: values[rows] for name, values in meta.items()})
+        return len(draws), len(draws) - len(self.draws)
+    
+    @property
+    def source_text(self):
+        """最近一次导入的TXT文件解码后的文本
+
+        只保留原始字节和编码，每次访问时按记录的编码解码，解码后的文本不常驻内存。
+        """
+        if self._source_chunks is None:
+            return None
+        if len(self._source_chunks) > 1:
+            self._source_chunks = [b''.join(self._source_chunks)]
+        raw = self._source_chunks[0]
+        try:
+            return raw.decode(self.source_encoding, errors='replace')
+        except (TypeError, LookupError):
+            # 编码未知（命中旧缓存）或为替代解码时重新识别
+            text, self.source_encoding = _decode_bytes(raw)
+            return text
+    
+    @property
+    def data(self):
+        """按需构建的DataFrame（仅用于显示或导出），分析使用 draws"""
+        if self.draws is None:
+            return None
+        if self._frame is None:
+            self._frame = pd.DataFrame(self.draws.astype(np.int64), columns=self.column_labels)
+        return self._frame
+    
+    @data.setter
+    def data(self, frame):
+        if frame is None:
+            self._set_draws(None)
+            return
+        draws, error = _frame_to_draws(frame)
+        if draws is None:
+            raise ValueError(error)
+        self._set_draws(draws)
+        self._source_path = None  # 数据已不再对应导入的文件
+        self._catalog = {}
+    
+    def _set_draws(self, draws, labels=None, meta=None):
+        """替换号码矩阵及元数据，并清除由旧数据构建的DataFrame和期号索引"""
+        with self._lock:
+            # (N, 7) 的uint8号码矩阵，所有分析都基于它
+            self.draws = None if draws is None else np.ascontiguousarray(draws, dtype=np.uint8)
+            self.column_labels = list(labels) if labels is not None else list(range(7))  # 构建DataFrame时使用的列名
+            count = 0 if draws is None else len(self.draws)
+            self.meta = meta if meta is not None else _empty_meta(count)  # 与 draws 平行的年份、期号、月、日
+            self._draw_store = None if draws is None else _GrowableArray(self.draws)
+            self._count_prefix = None
+            self._features = None  # 特征名 → _GrowableArray
+            self._omission = None  # 全部数据的 _OmissionTracker
+            self._cooccurrence = None  # 全部数据的 _CooccurrenceTable
+            self._bitsets = None  # 每期号码位集的 _GrowableArray
+            self._zodiac_features = None  # (生肖查找表, _GrowableArray)
+            self._data_hasher = None  # 号码矩阵内容的哈希，追加数据时继续更新
+            self._row_check = None  # (已检查的行数, _check_draw_chunks 的结果)
+            self._analysis_cache = OrderedDict()  # (数据指纹, 起止行, 生肖映射) → 分析结果，按最近使用排序
+            self._meta_stores = {name: _GrowableArray(self.meta[name]) for name in META_FIELDS}
+            self._frame = None
+            self._period_index = None
+    
+    def _append_rows(self, draws: np.ndarray, meta: Dict[str, np.ndarray]):
+        """在末尾追加新行，只更新已构建的派生结构而不重建"""
+        with self._lock:
+            start = len(self.draws)
+            self._draw_store.append(draws.astype(np.uint8))
+            self.draws = self._draw_store.view
+            self.meta = {}
+            for name in META_FIELDS:
+                self._meta_stores[name].append(meta[name])
+                self.meta[name] = self._meta_stores[name].view
+            self._on_rows_appended(start)
+    
+    def _on_rows_appended(self, start: int):
+        """新行追加到 start 之后时更新派生结构"""
+        self._frame = None
+        self._analysis_cache.clear()
+        if self._data_hasher is not None:
+            self._data_hasher.update(self.draws[start:])
+        if self._count_prefix is not None:
+            table = self._count_prefix.view
+            if (len(self.draws) + 1) * table[0].nbytes > PREFIX_TABLE_MAX_BYTES or self.draws[start:].max() > 49:
+                self._count_prefix = None
+            else:
+                self._count_prefix.append(_build_count_prefix(self.draws[start:])[1:] + table[-1])
+        if self._features is not None:
+            for name, values in _draw_features(self.draws[start:]).items():
+                self._features[name].append(values)
+        if self._cooccurrence is not None:
+            self._cooccurrence.append(self.draws[start:])
+        if self._bitsets is not None:
+            self._bitsets.append(_draw_bitsets(self.draws[start:]))
+        if self._omission is not None:
+            if len(self.draws) - start > OMISSION_REBUILD_ROWS:
+                self._omission = None
+            else:
+                self._omission.append(self.draws[start:])
+        if self._zodiac_features is not None:
+            lut, store = self._zodiac_features
+            store.append(_zodiac_counts(self.draws[start:], lut))
+        if self._period_index is not None:
+            keys = zip(self.meta["year"][start:].tolist(), self.meta["period"][start:].tolist())
+            for key, row in zip(keys, range(start, len(self.draws))):
+                self._period_index.setdefault(key, row)
+    
+    def append_new_data(self) -> Tuple[bool, str]:
+        """只解析源文件末尾新增的行并追加到现有数据
+
+        文件被截断或改写（末尾内容与上次不同）时退回到完整导入。
+        """
+        if self._catalog:
+            return self.refresh_catalog()
+        file_path = self._source_path
+        if file_path is None or self.draws is None:
+            return False, "请先导入数据文件"
+        if not file_path.lower().endswith('.txt'):
+            # Excel 文件无法按字节追加
+            return self.load_data(file_path)
+        try:
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                tail = self._source_tail
+                if size < self._source_size:
+                    return self.load_data(file_path)
+                f.seek(self._source_size - len(tail))
+                if f.read(len(tail)) != tail:
+                    return self.load_data(file_path)
+                new_bytes = f.read()
+        except OSError as e:
+            return False, f"无法读取文件: {str(e)}"
+        
+        if not new_bytes:
+            return True, f"没有新增数据，共 {len(self.draws)} 行"
+        # 上次的最后一行被续写时无法只解析新增部分
+        if tail and tail[-1:] not in (b'\n', b'\r') and new_bytes[:1] not in (b'\n', b'\r'):
+            return self.load_data(file_path)
+        
+        encoding = {'utf-8-sig': 'utf-8'}.get(self.source_encoding, self.source_encoding)
+        if encoding not in TEXT_ENCODINGS:
+            return self.load_data(file_path)
+        try:
+            content = new_bytes.decode(encoding)
+        except UnicodeDecodeError:
+            # 新内容不符合原编码，重新识别整个文件
+            return self.load_data(file_path)
+        # 新增的行全部保留，与完整导入同一文件的结果一致（缓存也按完整文件记录）
+        parsed_data, parsed_meta = _parse_draw_text(content, new_bytes if encoding == 'utf-8' else None)
+        if len(parsed_data):
+            self._append_rows(parsed_data, parsed_meta)
+        
+        self._source_hasher.update(new_bytes)
+        self._source_size += len(new_bytes)
+        self._source_tail = (tail + new_bytes)[-SOURCE_TAIL_BYTES:]
+        if self._source_chunks is not None:
+            self._source_chunks.append(new_bytes)
+        
+        if self.use_sidecar_cache:
+            signature = _file_signature(file_path, self._source_hasher.copy())
+            rows = dict(parsed_meta, draws=parsed_data.astype(np.uint8))
+            if not _append_sidecar(file_path, signature, rows):
+                _write_sidecar(file_path, signature, dict(self.meta, draws=self.draws),
+                               labels=self.column_labels, encoding=self.source_encoding)
+        
+        print(f"追加了 {len(parsed_data)} 行新数据，共 {len(self.draws)} 行")
+        return True, f"追加了 {len(parsed_data)} 行新数据，共 {len(self.draws)} 行"
+    
+    @property
+    def has_period_info(self) -> bool:
+        """导入的数据是否包含期号信息"""
+        return self.draws is not None and bool(self.meta["period"].any())
+    
+    def _get_period_index(self) -> Dict[Tuple[int, int], int]:
+        """(年份, 期号) → 行索引的字典，首次查找时构建；重复的期号保留第一次出现的行"""
+        if self._period_index is None:
+            keys = zip(self.meta["year"][::-1].tolist(), self.meta["period"][::-1].tolist())
+            self._period_index = dict(zip(keys, range(len(self.draws) - 1, -1, -1)))
+        return self._period_index
+    
+    def _get_count_prefix(self):
+        """前缀计数表，首次使用时构建；超过内存上限或数据中有超出范围的号码时返回 None"""
+        with self._lock:
+            if self._count_prefix is None:
+                if (len(self.draws) + 1) * 7 * 50 * 4 > PREFIX_TABLE_MAX_BYTES:
+                    return None
+                if len(self._check_rows()["out_of_range"]):
+                    return None
+                self._count_prefix = _GrowableArray(_build_count_prefix(self.draws))
+            return self._count_prefix.view
+    
+    def snapshot(self, include=SNAPSHOT_TABLES) -> 'DatasetSnapshot':
+        """当前数据的只读快照，包含号码矩阵、生肖映射以及 include 中列出的数据指纹和派生表
+
+        include 取自 SNAPSHOT_TABLES；没有包含的派生表在快照中按区间现场计算，因此只需要号码矩阵的调用
+        可以传入空元组，不必构建全部派生表。
+        快照之后追加或重新导入的数据不会影响快照；多个线程可以各自对同一快照调用 analyze_snapshot。
+        """
+        with self._lock:
+            if self.draws is None:
+                return DatasetSnapshot(None, self.zodiac_mapping)
+            tables = {}
+            if "count_prefix" in include:
+                tables["count_prefix"] = self._get_count_prefix()
+            if "features" in include:
+                tables["features"] = self.get_features()
+            if "omission" in include:
+                if self._omission is None:
+                    self._omission = _OmissionTracker(self.draws)
+                tables["omission"] = self._omission.stats()
+            if "cooccurrence" in include:
+                tables["cooccurrence"] = self._get_cooccurrence().state()
+            if "bitsets" in include:
+                tables["bitsets"] = self.get_bitsets()
+            fingerprint = self._data_fingerprint() if "fingerprint" in include else None
+            return DatasetSnapshot(self.draws, self.zodiac_mapping, fingerprint, **tables)
+    
+    def get_bitsets(self, start: int = 0, end: int = None) -> np.ndarray:
+        """第 [start, end) 行的号码位集（视图）：uint64，第 n 位表示该期有号码 n
+
+        首次使用时构建一次，追加数据时只计算新增的行。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        with self._lock:
+            if self._bitsets is None:
+                self._bitsets = _GrowableArray(_draw_bitsets(self.draws))
+            return self._bitsets.view[start:end]
+    
+    def overlap_counts(self, numbers, start: int = 0, end: int = None) -> np.ndarray:
+        """第 [start, end) 行每一期与给定号码集合相同的号码个数"""
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        return _popcount(self.get_bitsets(start, end) & _numbers_mask(numbers))
+    
+    def find_similar_draws(self, numbers, min_overlap: int = 3, start: int = 0,
+                           end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """查找第 [start, end) 行中与给定号码至少有 min_overlap 个相同号码的期
+
+        返回 (行号, 相同号码个数)，按相同号码个数从多到少排列，个数相同时较近的期在前。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        overlaps = self.overlap_counts(numbers, start, max(start, end))
+        rows = np.flatnonzero(overlaps >= min_overlap)
+        order = np.lexsort((-rows, -overlaps[rows].astype(np.int64)))
+        rows = rows[order]
+        return rows + start, overlaps[rows]
+    
+    def score_candidates(self, candidates, start: int = 0, end: int = None) -> np.ndarray:
+        """批量统计多组候选号码在第 [start, end) 行中的历史命中情况
+
+        返回 (候选数, 8)：[i, k] 为与第 i 组候选恰有 k 个相同号码的期数。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        masks = np.array([_numbers_mask(numbers) for numbers in candidates], dtype=np.uint64)
+        return _overlap_histograms(self.get_bitsets(start, end), masks)
+    
+    def filter_draws(self, include=(), exclude=(), min_hits: int = None, hits_from=(),
+                     start: int = 0, end: int = None) -> np.ndarray:
+        """筛选第 [start, end) 行中符合条件的期，返回行号数组
+
+        Args:
+            include: 必须全部包含的号码
+            exclude: 不能包含的号码
+            min_hits: 至少包含 hits_from 中的多少个号码，None 表示不限制
+            hits_from: 与 min_hits 配合使用的号码集合
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        bitsets = self.get_bitsets(start, max(start, end))
+        required = _numbers_mask(include)
+        keep = ((bitsets & required) == required) & ((bitsets & _numbers_mask(exclude)) == 0)
+        if min_hits is not None:
+            keep &= _popcount(bitsets & _numbers_mask(hits_from)) >= min_hits
+        return np.flatnonzero(keep) + start
+    
+    def _get_cooccurrence(self) -> _CooccurrenceTable:
+        """全部数据的共现计数，首次使用时构建，追加数据时只累加新增的行"""
+        with self._lock:
+            if self._cooccurrence is None:
+                self._cooccurrence = _CooccurrenceTable(self.draws)
+            return self._cooccurrence
+    
+    def get_cooccurrence(self, start: int = 0, end: int = None) -> np.ndarray:
+        """第 [start, end) 行中号码两两同期出现的次数：(49, 49)，[i-1, j-1] 对应号码 i、j，对角线为号码出现的期数"""
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        return self.snapshot(("cooccurrence",)).get_cooccurrence(start, end)
+    
+    def top_pairs(self, k: int = 3, start: int = 0, end: int = None) -> Dict[int, List[Tuple[int, int]]]:
+        """第 [start, end) 行中每个号码同期出现次数最多的 k 个号码，{号码: [(号码, 次数), ...]}"""
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        return _top_partners(self.get_cooccurrence(start, end), k)
+    
+    def count_range(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """第 [start, end) 行中号码的出现次数，返回 (全部号码, 每列, 特别号码)，下标即号码
+
+        使用前缀计数表时只需一次相减，耗时与区间长度无关。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        return self.snapshot(("count_prefix",)).count_range(start, end)
+    
+    def rolling_analysis(self, window: int, start: int = 0, end: int = None, step: int = 1) -> Dict[str, np.ndarray]:
+        """第 [start, end) 行中每个长度为 window 的滑动窗口的统计，step 为相邻窗口起点的间隔
+
+        返回 starts（各窗口的起始行）、counts（各号码出现次数，(窗口数, 49)，第 i 列为号码 i+1）、
+        zodiac（按 ZODIAC_NAMES 顺序的各生肖出现次数）、odd / big（奇数、大号个数之和）、zones（5个区间的个数之和），
+        以及派生统计 hot（每个窗口出现最多的号码）、missing（每个窗口未出现的号码个数）、
+        mean / std（每个号码在各窗口中出现次数的平均值和标准差）。
+        所有窗口由前缀和一次相减得到，与窗口长度和个数无关。
+        """
+        if self.draws is None or len(self.draws) == 0:
+            return {"错误": "没有数据可分析"}
+        if window <= 0 or step <= 0:
+            return {"错误": f"窗口长度和步长必须为正整数: {window}, {step}"}
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        end = max(start, end)
+        offsets = np.arange(0, max(end - start - window + 1, 0), step)
+        
+        def window_sums(prefix):
+            return prefix[offsets + window] - prefix[offsets]
+        
+        table = self._get_count_prefix()
+        if table is not None:
+            prefix = table[start:end + 1].sum(axis=1, dtype=np.int64)[:, 1:50]
+        else:
+            prefix = np.zeros((end - start + 1, 49), dtype=np.int64)
+            pos = start
+            for chunk in _iter_row_chunks(self.draws[start:end], FEATURE_CHUNK_ROWS):
+                hits = (chunk[:, :, None] == np.arange(1, 50, dtype=np.uint8)).sum(axis=1)
+                prefix[pos - start + 1:pos - start + 1 + len(chunk)] = np.cumsum(hits, axis=0) + prefix[pos - start]
+                pos += len(chunk)
+        counts = window_sums(prefix)
+        
+        # 号码 → 生肖的计数矩阵，生肖次数为号码次数按生肖求和
+        lut = _zodiac_lut(self.zodiac_mapping)
+        to_zodiac = np.zeros((49, len(ZODIAC_NAMES)), dtype=np.int64)
+        to_zodiac[np.arange(49), lut[1:50]] = 1
+        
+        features = self.get_features(start, end)
+        result = {
+            "starts": offsets + start,
+            "counts": counts,
+            "zodiac": counts @ to_zodiac
+        }
+        for name in ("odd", "big", "zones"):
+            values = features[name].astype(np.int64)
+            prefix = np.concatenate((np.zeros((1,) + values.shape[1:], dtype=np.int64), np.cumsum(values, axis=0)))
+            result[name] = window_sums(prefix)
+        result["hot"] = counts.argmax(axis=1) + 1 if len(counts) else np.empty(0, dtype=np.int64)
+        result["missing"] = (counts == 0).sum(axis=1)
+        result["mean"] = counts.mean(axis=0) if len(counts) else np.zeros(49)
+        result["std"] = counts.std(axis=0) if len(counts) else np.zeros(49)
+        return result
+    
+    def analyze_ranges(self, ranges, workers: int = None) -> Dict[str, np.ndarray]:
+        """批量统计多个区间，ranges 为 [(start_period, end_period), ...]，区间含义与 analyze_data 相同
+
+        返回按区间排列的紧凑数组：ranges（实际的行区间 [start, end)）、rows（行数）、
+        counts / special（全部号码和特别号码的出现次数，(区间数, 49)，第 i 列为号码 i+1）、
+        sum_mean / span_mean（平均和值、平均跨度）、odd / big（奇数、大号个数之和）。
+        区间按 BATCH_TASK_RANGES 分批交给进程池；工作进程通过共享内存或解析缓存的内存映射读取号码矩阵，
+        任务只传递区间，不复制数据。workers 默认为 parallel_workers，为1时在当前进程中计算。
+        """
+        # 工作进程只读取号码矩阵，不构建其他派生表
+        snapshot = self.snapshot(())
+        if snapshot.draws is None:
+            return {"错误": "未加载数据"}
+        draws = snapshot.draws
+        resolved = np.array([_resolve_range(len(draws), None, start, end) for start, end in ranges],
+                            dtype=np.int64).reshape(-1, 2)
+        workers = workers or self.parallel_workers or os.cpu_count() or 1
+        batches = [resolved[i:i + BATCH_TASK_RANGES] for i in range(0, len(resolved), BATCH_TASK_RANGES)]
+        
+        if workers <= 1 or len(batches) <= 1:
+            parts = [_summarize_ranges(draws, batch) for batch in batches]
+        else:
+            shm = None
+            path = _mapped_file(draws)
+            if path is not None:
+                source = ('mmap', path)
             else:
-                return False, "不支持的文件格式，请使用.xlsx或.txt文件"
-            
-            # 验证数据是否成功加载
-            if self.data is None or len(self.data) == 0:
-                return False, "未能加载数据或数据为空"
-                
-            print(f"数据加载完成，共 {len(self.data)} 行")
-            return True, f"数据加载成功，共 {len(self.data)} 行"
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return False, f"数据加载失败：{str(e)}"
+                shm = shared_memory.SharedMemory(create=True, size=max(draws.nbytes, 1))
+                np.ndarray(draws.shape, dtype=np.uint8, buffer=shm.buf)[:] = draws
+                source = ('shm', shm.name)
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_attach_batch_draws,
+                                         initargs=source + (draws.shape,)) as executor:
+                    parts = list(executor.map(_summarize_batch, batches))
+            finally:
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+        
+        result = {"ranges": resolved, "rows": resolved[:, 1] - resolved[:, 0]}
+        for name in ("counts", "special", "sum_mean", "span_mean", "odd", "big"):
+            if parts:
+                result[name] = np.concatenate([part[name] for part in parts])
+            else:
+                result[name] = _summarize_ranges(draws, resolved)[name]
+        return result
+    
+    def get_omission(self, start: int = 0, end: int = None) -> Dict[str, np.ndarray]:
+        """第 [start, end) 行中各号码的遗漏统计，见 _OmissionTracker.stats
+
+        全部数据的统计只构建一次，追加数据时逐期更新；其他区间现场计算。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        return self.snapshot(("omission",)).get_omission(start, end)
+
+    def get_omission_history(self, start: int = 0, end: int = None) -> Dict[str, np.ndarray]:
+        """第 [start, end) 行中每一期之后各号码的当前、最大、平均遗漏和遗漏标准差，见 _omission_history
+
+        返回 (行数, 49) 的数组（每行约 0.8KB），不缓存；只需要最新一期的统计时使用 get_omission。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        return self.snapshot(()).get_omission_history(start, end)
+
+    def get_features(self, start: int = 0, end: int = None) -> Dict[str, np.ndarray]:
+        """第 [start, end) 行的每期特征（视图）
+
+        包括 sum（和值）、span（跨度）、odd（奇数个数）、big（大号个数）、zones（5个区间的个数）、
+        tails（0-9尾的个数）和 zodiac（按 ZODIAC_NAMES 顺序的各生肖个数）。
+        特征表在首次使用时构建一次，追加数据时只计算新增的行；生肖映射变化时重建生肖列。
+        """
+        if self.draws is None:
+            return {"错误": "未加载数据"}
+        with self._lock:
+            if self._features is None:
+                self._features = {name: _GrowableArray(values)
+                                  for name, values in _draw_features(self.draws).items()}
+            lut = _zodiac_lut(self.zodiac_mapping)
+            if self._zodiac_features is None or not np.array_equal(self._zodiac_features[0], lut):
+                self._zodiac_features = (lut, _GrowableArray(_zodiac_counts(self.draws, lut)))
+            features = {name: store.view[start:end] for name, store in self._features.items()}
+            features["zodiac"] = self._zodiac_features[1].view[start:end]
+            return features
+    
+    def _check_rows(self) -> Dict[str, np.ndarray]:
+        """号码矩阵的检查结果（见 _check_draw_chunks），按数据版本缓存
+
+        数据未变化时直接返回上次的结果；追加数据后只检查新增的行。
+        """
+        with self._lock:
+            checked = self._row_check
+            if checked is None:
+                checked = (0, _check_draw_chunks(()))
+            rows, check = checked
+            if rows < len(self.draws):
+                check = _merge_checks(check, _check_draw_chunks(_iter_row_chunks(self.draws[rows:]), rows))
+                self._row_check = (len(self.draws), check)
+            return check
+    
+    def invalid_rows(self) -> Dict[str, np.ndarray]:
+        """含超出范围号码的行（out_of_range）和含重复号码的行（duplicates），均为行号数组"""
+        check = self._check_rows()
+        return {"out_of_range": check["out_of_range"].copy(), "duplicates": check["duplicates"].copy()}
     
     def validate_data(self) -> Tuple[bool, List[str]]:
         """验证数据格式"""
         errors = []
-        if self.data is None:
+        if self.draws is None:
             errors.append("未加载数据")
             return False, errors
             
         try:
-            # 检查列数
-            if len(self.data.columns) != 7:
-                errors.append(f"列数不正确：期望7列，实际{len(self.data.columns)}列")
-            
-            # 检查数据类型
-            for col in self.data.columns:
-                if not pd.api.types.is_numeric_dtype(self.data[col]):
-                    errors.append(f"第{col+1}列包含非数字数据")
-            
-            # 检查数值范围
-            for col in self.data.columns:
-                invalid_numbers = self.data[~self.data[col].between(1, 49)]
-                if not invalid_numbers.empty:
-                    errors.append(f"第{col+1}列包含超出范围(1-49)的数值")
-            
-            # 检查每行是否有重复值
-            for idx, row in self.data.iterrows():
-                row_numbers = row.values
-                if len(set(row_numbers)) != 7:
-                    errors.append(f"第{idx+1}行包含重复的号码")
+            # 检查数值范围和每行是否有重复值（数据未变化时使用缓存的结果）
+            errors.extend(_check_errors(self._check_rows()))
             
             # 检查是否为空
-            if self.data.empty:
+            if len(self.draws) == 0:
                 errors.append("数据为空")
             
             return len(errors) == 0, errors
@@ -198,8 +2131,10 @@ class LotteryDataAnalyzer:
             if not all(zodiac in valid_zodiacs for zodiac in mapping.values()):
                 return False
             
-            # 保存映射
-            self.zodiac_mapping = mapping
+            # 保存映射，按旧映射计算的分析结果不再有效
+            with self._lock:
+                self.zodiac_mapping = mapping
+                self._analysis_cache.clear()
             try:
                 with open("zodiac_mapping.json", 'w', encoding='utf-8') as f:
                     json.dump(mapping, f, ensure_ascii=False, indent=2)
@@ -214,6 +2149,38 @@ class LotteryDataAnalyzer:
         """获取号码对应的生肖"""
         return self.zodiac_mapping.get(number, "未知")
     
+    def _data_fingerprint(self) -> str:
+        """号码矩阵内容的哈希，首次使用时计算，追加数据时只哈希新增的行"""
+        if self._data_hasher is None:
+            self._data_hasher = hashlib.blake2b(digest_size=16)
+            for chunk in _iter_row_chunks(self.draws):
+                self._data_hasher.update(chunk)
+        return self._data_hasher.hexdigest()
+    
+    def _cached_analysis(self, key) -> Dict:
+        """取出缓存的分析结果（副本），没有时返回 None"""
+        with self._lock:
+            if self.cache_size <= 0 or key not in self._analysis_cache:
+                return None
+            self._analysis_cache.move_to_end(key)
+            analysis = copy.deepcopy(self._analysis_cache[key])
+        analysis["基本信息"]["缓存命中"] = True
+        return analysis
+    
+    def _cache_analysis(self, key, analysis: Dict):
+        """保存分析结果，超过 cache_size 时丢弃最久未使用的结果"""
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._analysis_cache[key] = copy.deepcopy(analysis)
+            self._analysis_cache.move_to_end(key)
+            while len(self._analysis_cache) > self.cache_size:
+                self._analysis_cache.popitem(last=False)
+    
+    def clear_analysis_cache(self):
+        """清空分析结果缓存"""
+        self._analysis_cache.clear()
+    
     def analyze_data(self, num_periods: int = None, start_period: int = None, end_period: int = None) -> Dict:
         """分析数据模式
         
@@ -222,101 +2189,28 @@ class LotteryDataAnalyzer:
             start_period: 起始期数，如果为None则从头开始分析
             end_period: 结束期数，如果为None则分析到最后
         """
-        if self.data is None:
+        if self.draws is None:
             return {"错误": "未加载数据"}
         
-        # 创建数据副本，避免修改原始数据
-        data_to_analyze = self.data.copy()
-            
-        # 如果指定了期数范围，按范围分析数据
-        if start_period is not None and end_period is not None:
-            if start_period > end_period:
-                start_period, end_period = end_period, start_period
-            if start_period < 0:
-                start_period = 0
-            if end_period > len(data_to_analyze):
-                end_period = len(data_to_analyze)
-            data_to_analyze = data_to_analyze.iloc[start_period:end_period].copy()
-        # 如果指定了期数，只分析最近的n期数据
-        elif num_periods is not None and num_periods > 0:
-            if num_periods > len(data_to_analyze):
-                num_periods = len(data_to_analyze)
-            data_to_analyze = data_to_analyze.iloc[-num_periods:].copy()
-            
-        try:
-            analysis = {
-                "基本信息": {
-                    "总行数": int(len(data_to_analyze)),
-                    "分析时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                },
-                "号码统计": {},
-                "列分析": {},
-                "模式分析": {"特别号码": {}},
-                "生肖分析": {}
-            }
-            
-            # 只有在数据非空时添加数据范围信息
-            if not data_to_analyze.empty and len(data_to_analyze.index) > 0:
-                try:
-                    analysis["基本信息"]["数据范围"] = f"0 - {len(data_to_analyze) - 1}"
-                except:
-                    pass
-            
-            # 号码频率分析
-            try:
-                # 分析每个号码的出现频率
-                all_numbers = data_to_analyze.values.flatten()
-                number_freq = {}
-                for num in all_numbers:
-                    if not pd.isna(num):
-                        try:
-                            num_int = int(num)
-                            number_freq[num_int] = number_freq.get(num_int, 0) + 1
-                        except:
-                            pass
-                
-                analysis["号码统计"]["频率"] = number_freq
-            except Exception as e:
-                analysis["号码统计"]["频率"] = {"错误": f"统计号码频率时出错: {str(e)}"}
-            
-            # 生肖频率分析
-            try:
-                zodiac_freq = {}
-                for num, freq in number_freq.items():
-                    if isinstance(num, int) and 1 <= num <= 49:
-                        zodiac = self.get_number_zodiac(num)
-                        zodiac_freq[zodiac] = zodiac_freq.get(zodiac, 0) + freq
-                analysis["生肖分析"]["频率"] = zodiac_freq
-            except Exception as e:
-                analysis["生肖分析"]["频率"] = {"错误": f"统计生肖频率时出错: {str(e)}"}
-            
-            # 列分析
-            try:
-                self._analyze_columns(data_to_analyze, analysis)
-            except Exception as e:
-                analysis["列分析"] = {"错误": f"列分析时出错: {str(e)}"}
-            
-            # 特别号码分析
-            try:
-                self._analyze_special_numbers(data_to_analyze, analysis)
-            except Exception as e:
-                analysis["模式分析"]["特别号码"] = {"错误": f"特别号码分析时出错: {str(e)}"}
-            
-            # 组合模式分析
-            try:
-                self._analyze_combinations_for_data(data_to_analyze, analysis)
-            except Exception as e:
-                analysis["模式分析"]["组合模式"] = {"错误": f"组合模式分析时出错: {str(e)}"}
-            
-            self.analysis_results = analysis
+        snapshot = self.snapshot()
+        start, end = _resolve_range(len(snapshot.draws), num_periods, start_period, end_period)
+        # 相同数据、相同区间和相同生肖映射的分析直接返回缓存的结果，分析时间为当时计算的时间
+        cache_key = (snapshot.fingerprint, start, end, frozenset(snapshot.zodiac_mapping.items()))
+        cached = self._cached_analysis(cache_key)
+        if cached is not None:
+            self.analysis_results = cached
+            return cached
+        
+        analysis = analyze_snapshot(snapshot, start_period=start, end_period=end)
+        if "错误" in analysis:
             return analysis
-            
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return {"错误": f"分析过程中出错：{str(e)}"}
+        analysis["基本信息"]["缓存命中"] = False
+        self._cache_analysis(cache_key, analysis)
+        self.analysis_results = analysis
+        return analysis
     
-    def _analyze_consecutive_patterns(self, series: pd.Series) -> Dict:
+    @staticmethod
+    def _analyze_consecutive_patterns(series) -> Dict:
         """分析连续出现模式"""
         try:
             # 检查输入
@@ -324,90 +2218,59 @@ class LotteryDataAnalyzer:
                 return {"错误": "没有数据可分析"}
                 
             # 确保没有NaN值
-            series = series.dropna()
-            if len(series) == 0:
+            values = np.asarray(series)
+            if values.dtype.kind == 'f':
+                values = values[~np.isnan(values)]
+            if len(values) == 0:
                 return {"错误": "数据全为NaN"}
                 
-            if len(series) == 1:
+            if len(values) == 1:
                 # 只有一条数据
                 return {
-                    "连续出现次数": {int(series.iloc[0]): 1},
-                    "最长连续": 1
+                    "连续出现次数": {int(values[0]): 1},
+                    "最长连续": 1,
+                    "连续长度分布": {1: 1}
                 }
                 
-            patterns = {
-                "连续出现次数": {},
-                "最长连续": 1
-            }
-            
-            # 获取第一个有效值
-            try:
-                current_number = int(series.iloc[0])
-            except (ValueError, TypeError):
-                return {"错误": "无法获取有效的起始值"}
-                
-            consecutive_count = 1
-            max_consecutive = 1
-            
-            # 分析连续出现
-            for num in series.iloc[1:]:
-                try:
-                    # 尝试将数据转换为整数
-                    num_int = int(num)
-                    
-                    if num_int == current_number:
-                        consecutive_count += 1
-                        max_consecutive = max(max_consecutive, consecutive_count)
-                        patterns["连续出现次数"][current_number] = max(
-                            patterns["连续出现次数"].get(current_number, 0),
-                            consecutive_count
-                        )
-                    else:
-                        current_number = num_int
-                        consecutive_count = 1
-                except (ValueError, TypeError):
-                    # 跳过非整数值
-                    consecutive_count = 1
-                    continue
-            
-            patterns["最长连续"] = max_consecutive
-            return patterns
+            return _run_patterns(values.astype(np.int64))
             
         except Exception as e:
             # 出错时返回错误信息
             return {"错误": f"分析连续模式时出错: {str(e)}"}
             
-    def _analyze_intervals(self, series: pd.Series) -> Dict:
+    def get_consecutive_patterns(self, column: int = 6, start: int = 0, end: int = None,
+                                 zodiac: bool = False) -> Dict:
+        """第 [start, end) 行中某一列（默认特别号码）的连续出现模式
+
+        zodiac 为 True 时分析该列号码对应生肖的序列，键为生肖名。
+        """
+        # 只需要号码矩阵，不构建其他派生表
+        return self.snapshot(()).get_consecutive_patterns(column, start, end, zodiac)
+    
+    @staticmethod
+    def _analyze_intervals(series) -> Dict:
         """分析号码间隔"""
         try:
             if series is None or len(series) <= 1:
                 return {"说明": "数据不足，无法分析间隔"}
                 
             # 确保没有NaN值
-            series = series.dropna()
-            if len(series) <= 1:
+            values = np.asarray(series)
+            if values.dtype.kind == 'f':
+                values = values[~np.isnan(values)]
+            if len(values) <= 1:
                 return {"说明": "有效数据不足，无法分析间隔"}
                 
+            # 间隔为相邻两次出现的行号之差，即遗漏期数加1
+            stats = _OmissionTracker(values.astype(np.int64).reshape(-1, 1)).stats()
             intervals = {}
-            for num in range(1, 50):
-                try:
-                    # 找出该号码出现的位置
-                    positions = series[series == num].index
-                    
-                    if len(positions) > 1:
-                        # 计算间隔
-                        gaps = [int(positions[i+1] - positions[i]) for i in range(len(positions)-1)]
-                        
-                        # 统计间隔信息
-                        intervals[num] = {
-                            "平均间隔": float(round(np.mean(gaps), 2)),
-                            "最大间隔": int(max(gaps)),
-                            "最小间隔": int(min(gaps)),
-                            "间隔标准差": float(round(np.std(gaps), 2)) if len(gaps) > 1 else 0.0
-                        }
-                except Exception as e:
-                    # 忽略单个号码的错误
-                    continue
+            for num in np.flatnonzero(stats["gap_count"][1:50]) + 1:
+                intervals[int(num)] = {
+                    "平均间隔": float(round(stats["mean"][num] + 1, 2)),
+                    "最大间隔": int(stats["gap_max"][num]) + 1,
+                    "最小间隔": int(stats["gap_min"][num]) + 1,
+                    "间隔标准差": float(round(stats["std"][num], 2)) if stats["gap_count"][num] > 1 else 0.0
+                }
                     
             return intervals
             
@@ -415,37 +2278,43 @@ class LotteryDataAnalyzer:
             # 出错时返回错误信息
             return {"错误": f"分析间隔时出错: {str(e)}"}
     
-    def _analyze_columns(self, data, analysis):
-        """分析每列的统计信息"""
-        if data is None or data.empty:
+    @staticmethod
+    def _analyze_columns(data, analysis, counts=None):
+        """分析每列的统计信息，counts 为已统计的每列号码出现次数 (列数, 50)
+
+        所有列的统计量都由每列的号码直方图一次算出：号码只有1-49，中位数和众数可以直接从直方图精确得到。
+        """
+        if data is None or len(data) == 0:
             analysis["列分析"] = {"信息": "没有数据可分析"}
             return
             
         try:
-            for col in data.columns:
+            rows, columns = data.shape
+            if counts is None or counts.shape[0] != columns or (counts.sum(axis=1) != rows).any():
+                # 没有可用的计数（或数据中有超出范围的号码）时按列统计完整的直方图
+                counts = np.stack([np.bincount(data[:, col], minlength=256) for col in range(columns)])
+            values = np.arange(counts.shape[1])
+            mean = counts @ values / rows
+            variance = (counts * (values - mean[:, None]) ** 2).sum(axis=1) / max(rows - 1, 1)
+            present = counts > 0
+            cumulative = np.cumsum(counts, axis=1)
+            # 中位数为第 (rows-1)//2 和 rows//2 个（从0数）号码的平均值，取整与 int(np.median()) 相同
+            median = (np.argmax(cumulative > (rows - 1) // 2, axis=1) + np.argmax(cumulative > rows // 2, axis=1)) // 2
+            minimum = np.argmax(present, axis=1)
+            maximum = counts.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+            # 出现次数相同时取较小的号码，与 pandas 的 mode() 一致
+            mode = counts.argmax(axis=1)
+            for col in range(columns):
                 try:
-                    # 检查是否有NaN值
-                    col_data = data[col].dropna()
-                    if len(col_data) == 0:
-                        continue
-                    
                     col_stats = {
-                        "平均值": float(round(col_data.mean(), 2)),
-                        "标准差": float(round(col_data.std(), 2)) if len(col_data) > 1 else 0.0,
-                        "最小值": int(col_data.min()) if not pd.isna(col_data.min()) else 0,
-                        "最大值": int(col_data.max()) if not pd.isna(col_data.max()) else 0,
-                        "中位数": int(col_data.median()) if not pd.isna(col_data.median()) else 0
+                        "平均值": float(round(mean[col], 2)),
+                        "标准差": float(round(np.sqrt(variance[col]), 2)) if rows > 1 else 0.0,
+                        "最小值": int(minimum[col]),
+                        "最大值": int(maximum[col]),
+                        "中位数": int(median[col]),
+                        "众数": int(mode[col])
                     }
                     
-                    # 安全地添加众数
-                    try:
-                        if not col_data.mode().empty:
-                            col_stats["众数"] = int(col_data.mode().iloc[0])
-                        else:
-                            col_stats["众数"] = 0
-                    except:
-                        col_stats["众数"] = 0
-                    
                     analysis["列分析"][f"第{col+1}列"] = col_stats
                 except Exception as e:
                     # 出错时添加简化的统计信息
@@ -456,9 +2325,10 @@ class LotteryDataAnalyzer:
         except Exception as e:
             analysis["列分析"] = {"错误": f"列分析总体出错: {str(e)}"}
     
-    def _analyze_special_numbers(self, data, analysis):
-        """分析特别号码（第7列）的模式"""
-        if data is None or data.empty:
+    @staticmethod
+    def _analyze_special_numbers(data, analysis, counts=None):
+        """分析特别号码（第7列）的模式，counts 为已统计的特别号码出现次数"""
+        if data is None or len(data) == 0:
             analysis["模式分析"]["特别号码"] = {"信息": "没有数据可分析"}
             return
             
@@ -466,34 +2336,22 @@ class LotteryDataAnalyzer:
             special_col = 6  # 第7列索引为6
             
             # 检查列是否存在
-            if special_col not in data.columns:
+            if data.shape[1] <= special_col:
                 analysis["模式分析"]["特别号码"] = {"信息": "数据中缺少特别号码列"}
                 return
                 
-            # 获取特别号码列，并处理可能的NaN值
-            special_numbers = data[special_col].dropna()
-            
-            if len(special_numbers) == 0:
-                analysis["模式分析"]["特别号码"] = {"信息": "特别号码列中没有有效数据"}
-                return
-                
+            special_numbers = data[:, special_col]
             special_analysis = {}
             
-            # 计算频率
-            freq_counts = {}
-            for num in special_numbers:
-                try:
-                    num_int = int(num)
-                    freq_counts[num_int] = freq_counts.get(num_int, 0) + 1
-                except:
-                    continue
-                    
-            special_analysis["出现频率最高的号码"] = dict(
-                sorted(freq_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-            )
+            # 计算频率（次数相同时先出现的号码在前）
+            if counts is None:
+                counts = np.bincount(special_numbers, minlength=50)
+            order = _first_occurrence_order(special_numbers)
+            top = order[np.argsort(-counts[order], kind='stable')[:10]]
+            special_analysis["出现频率最高的号码"] = _counts_to_dict(counts, top)
             
             # 计算连续模式
-            consecutive_patterns = self._analyze_consecutive_patterns(special_numbers)
+            consecutive_patterns = LotteryDataAnalyzer._analyze_consecutive_patterns(special_numbers)
             if "错误" not in consecutive_patterns:
                 special_analysis["连续模式"] = consecutive_patterns
                 
@@ -507,68 +2365,35 @@ class LotteryDataAnalyzer:
                 
             analysis["模式分析"]["特别号码"]["错误"] = f"分析特别号码时出错: {str(e)}"
     
-    def _analyze_combinations_for_data(self, data, analysis):
-        """分析号码组合模式"""
-        if data is None or data.empty:
+    @staticmethod
+    def _analyze_combinations_for_data(data, analysis, features=None):
+        """分析号码组合模式，features 为这些行的每期特征（没有时现场计算）"""
+        if data is None or len(data) == 0:
             analysis["模式分析"]["组合模式"] = {"信息": "没有数据可分析"}
             return
             
         try:
+            valid_rows = len(data)
+            if features is None:
+                features = _draw_features(data)
+            odd, big = features["odd"], features["big"]
+            zone = features["zones"] @ _ZONE_WEIGHTS
+            
+            # 奇偶比例、大小比例（以25为界）、区间分布（1-10, 11-20, 21-30, 31-40, 41-49）
+            # 模式按第一次出现的顺序排列
             combinations = {
-                "奇偶比例": {},
-                "大小比例": {},
-                "区间分布": {}
+                "奇偶比例": {f"{k}:{7 - k}": v for k, v in _tally_keys(odd)},
+                "大小比例": {f"{k}:{7 - k}": v for k, v in _tally_keys(big)},
+                "区间分布": {"-".join(str(k >> shift & 7) for shift in (12, 9, 6, 3, 0)): v
+                         for k, v in _tally_keys(zone)}
             }
             
-            valid_rows = 0
-            
-            for idx, row in data.iterrows():
-                # 跳过包含NaN的行
-                if row.isna().any():
-                    continue
-                    
-                try:
-                    valid_rows += 1
-                    row_vals = [int(x) for x in row if not pd.isna(x)]
-                    
-                    # 确保行有足够的数据
-                    if len(row_vals) < 7:
-                        continue
-                    
-                    # 分析奇偶比例
-                    odd_count = sum(1 for x in row_vals if x % 2 == 1)
-                    even_count = 7 - odd_count
-                    ratio = f"{odd_count}:{even_count}"
-                    combinations["奇偶比例"][ratio] = combinations["奇偶比例"].get(ratio, 0) + 1
-                    
-                    # 分析大小比例（以25为界）
-                    big_count = sum(1 for x in row_vals if x > 25)
-                    small_count = 7 - big_count
-                    ratio = f"{big_count}:{small_count}"
-                    combinations["大小比例"][ratio] = combinations["大小比例"].get(ratio, 0) + 1
-                    
-                    # 分析区间分布
-                    zones = [0] * 5  # 1-10, 11-20, 21-30, 31-40, 41-49
-                    for x in row_vals:
-                        if 1 <= x <= 10: zones[0] += 1
-                        elif 11 <= x <= 20: zones[1] += 1
-                        elif 21 <= x <= 30: zones[2] += 1
-                        elif 31 <= x <= 40: zones[3] += 1
-                        else: zones[4] += 1
-                    zone_pattern = "-".join(map(str, zones))
-                    combinations["区间分布"][zone_pattern] = combinations["区间分布"].get(zone_pattern, 0) + 1
-                except Exception:
-                    # 忽略处理单行时的错误
-                    valid_rows -= 1
-                    continue
-            
             # 转换为百分比
-            if valid_rows > 0:
-                for category in combinations:
-                    combinations[category] = {
-                        k: round(v/valid_rows * 100, 2) 
-                        for k, v in combinations[category].items()
-                    }
+            for category in combinations:
+                combinations[category] = {
+                    k: round(v/valid_rows * 100, 2) 
+                    for k, v in combinations[category].items()
+                }
             
             analysis["模式分析"]["组合模式"] = combinations
             
@@ -580,64 +2405,18 @@ class LotteryDataAnalyzer:
         """分析号码组合模式（兼容性方法）"""
         try:
             # 获取数据
-            if self.data is None or self.data.empty:
+            if self.draws is None or len(self.draws) == 0:
                 return {
                     "奇偶比例": {},
                     "大小比例": {},
                     "区间分布": {}
                 }
                 
-            combinations = {
-                "奇偶比例": {},
-                "大小比例": {},
-                "区间分布": {}
-            }
-            
-            valid_rows = 0
-            
-            for idx, row in self.data.iterrows():
-                # 跳过包含NaN的行
-                if row.isna().any():
-                    continue
-                    
-                try:
-                    valid_rows += 1
-                    
-                    # 分析奇偶比例
-                    odd_count = sum(1 for x in row if x % 2 == 1)
-                    even_count = 7 - odd_count
-                    ratio = f"{odd_count}:{even_count}"
-                    combinations["奇偶比例"][ratio] = combinations["奇偶比例"].get(ratio, 0) + 1
-                    
-                    # 分析大小比例（以25为界）
-                    big_count = sum(1 for x in row if x > 25)
-                    small_count = 7 - big_count
-                    ratio = f"{big_count}:{small_count}"
-                    combinations["大小比例"][ratio] = combinations["大小比例"].get(ratio, 0) + 1
-                    
-                    # 分析区间分布
-                    zones = [0] * 5  # 1-10, 11-20, 21-30, 31-40, 41-49
-                    for x in row:
-                        if 1 <= x <= 10: zones[0] += 1
-                        elif 11 <= x <= 20: zones[1] += 1
-                        elif 21 <= x <= 30: zones[2] += 1
-                        elif 31 <= x <= 40: zones[3] += 1
-                        else: zones[4] += 1
-                    zone_pattern = "-".join(map(str, zones))
-                    combinations["区间分布"][zone_pattern] = combinations["区间分布"].get(zone_pattern, 0) + 1
-                except Exception:
-                    # 忽略处理单行时的错误
-                    valid_rows -= 1
-                    continue
-            
-            # 转换为百分比
-            if valid_rows > 0:
-                for category in combinations:
-                    combinations[category] = {
-                        k: round(v/valid_rows * 100, 2) 
-                        for k, v in combinations[category].items()
-                    }
-            
+            analysis = {"模式分析": {}}
+            self._analyze_combinations_for_data(self.draws, analysis, self.get_features())
+            combinations = analysis["模式分析"]["组合模式"]
+            if "错误" in combinations:
+                raise ValueError(combinations["错误"])
             return combinations
             
         except Exception as e:
@@ -649,13 +2428,15 @@ class LotteryDataAnalyzer:
                 "区间分布": {}
             }
     
-    def get_prediction(self, num_predictions: int = 4) -> List[List[int]]:
-        """基于分析结果生成预测号码"""
-        if not self.analysis_results:
+    def get_prediction(self, num_predictions: int = 4, analysis: Dict = None) -> List[List[int]]:
+        """基于分析结果生成预测号码，analysis 为 analyze_snapshot 返回的结果，默认使用最近一次 analyze_data 的结果"""
+        if analysis is None:
+            analysis = self.analysis_results
+        if not analysis:
             return []
             
         predictions = []
-        number_freq = self.analysis_results["号码统计"]["频率"]
+        number_freq = analysis["号码统计"]["频率"]
         
         for _ in range(num_predictions):
             selected = []
@@ -683,6 +2464,9 @@ class LotteryDataAnalyzer:
         """
         查找特定年份和期数对应的数据索引
         
+        导入时解析出期号信息的数据通过 (年份, 期号) 索引在常数时间内查找，
+        否则按期数位置和原始文本兼容查找。
+        
         Args:
             year: 年份，如2025
             period: 期数，如34
@@ -691,10 +2475,24 @@ class LotteryDataAnalyzer:
             找到的索引，如果未找到则返回None
         """
         try:
-            if self.data is None or len(self.data.index) == 0:
+            if self.draws is None or len(self.draws) == 0:
                 print("没有加载数据或数据为空")
                 return None
                 
+            # 导入时解析出了期号信息，直接在 (年份, 期号) 索引中查找
+            if self.has_period_info:
+                period_index = self._get_period_index()
+                idx = period_index.get((year, period))
+                if idx is None and not self.meta["year"].any():
+                    # 数据只有期号没有年份
+                    idx = period_index.get((0, period))
+                if idx is not None:
+                    print(f"在期号索引中找到 {year}年{period:03d}期，对应索引: {idx}")
+                else:
+                    print(f"未找到匹配项: 年份={year}, 期数={period}")
+                return idx
+            
+            # 以下为数据中没有期号信息时的兼容查找方式
             # 格式化目标模式，支持不同的期数格式
             target_patterns = [
                 f"{year}年{period:03d}期",  # 格式：2025年034期
@@ -705,79 +2503,39 @@ class LotteryDataAnalyzer:
                 f"{year}-{period}"          # 格式：2025-34
             ]
             
-            # 1. 首先，直接在已加载的数据中查找（最可靠的方法）
-            try:
-                # 如果数据已经成功加载，我们可以查看前两列是否包含期数或年份信息
-                if hasattr(self, 'data') and self.data is not None and not self.data.empty:
-                    # 先处理期数
-                    # 如果期数在数据范围内，直接返回索引
-                    if 0 <= period-1 < len(self.data):
-                        print(f"在数据范围中找到期数 {period}，对应索引: {period-1}")
-                        return period-1
-                        
-                    # 还可以尝试遍历数据，寻找特定模式
-                    for idx, row in self.data.iterrows():
-                        # 检查是否有任何列包含年份和期数
-                        row_str = ','.join([str(val) for val in row.values])
-                        if f"{year}" in row_str and f"{period:03d}" in row_str:
-                            print(f"在数据行 {idx} 中找到匹配: {row_str}")
-                            return idx
-            except Exception as e:
-                print(f"在已加载数据中查找时出错: {str(e)}")
+            # 1. 如果期数在数据范围内，直接返回索引
+            if 0 <= period-1 < len(self.draws):
+                print(f"在数据范围中找到期数 {period}，对应索引: {period-1}")
+                return period-1
             
-            # 2. 如果数据是从TXT文件加载的，尝试从原始文件中查找
+            # 2. 如果数据是从TXT文件加载的，在导入时缓存的文本中查找
             try:
-                if hasattr(self, 'last_loaded_file') and self.last_loaded_file.lower().endswith('.txt'):
-                    # 尝试多种编码
-                    encodings = ['utf-8', 'gbk', 'gb2312', 'cp1252', 'windows-1252', 'latin1']
-                    for encoding in encodings:
-                        try:
-                            with open(self.last_loaded_file, 'r', encoding=encoding) as f:
-                                lines = f.readlines()
-                                
-                                # 遍历所有行，寻找匹配的年份和期数
-                                for idx, line in enumerate(lines):
-                                    line = line.strip()
-                                    if not line:
-                                        continue
-                                    
-                                    # 检查是否包含目标年份和期数的任一格式
-                                    for pattern in target_patterns:
-                                        if pattern in line:
-                                            print(f"在原始文件中使用 {encoding} 编码找到匹配行: {line}")
-                                            return idx
-                            # 如果没有抛出异常但也没有找到匹配，继续尝试下一个编码
-                        except UnicodeDecodeError:
-                            continue
-                        except Exception as e:
-                            print(f"使用 {encoding} 编码读取文件时出错: {str(e)}")
+                if self.source_text is not None:
+                    lines = _split_lines(self.source_text)
+                    
+                    # 遍历所有行，寻找匹配的年份和期数
+                    for idx, line in enumerate(lines):
+                        line = line.strip()
+                        if not line:
                             continue
-                            
-                    # 如果所有编码都尝试了但没有找到匹配，尝试二进制读取
-                    try:
-                        with open(self.last_loaded_file, 'rb') as f:
-                            binary_content = f.read()
                         
-                        # 使用latin1忽略错误模式
-                        content = binary_content.decode('latin1', errors='ignore')
-                        lines = content.splitlines()
-                        
-                        for idx, line in enumerate(lines):
-                            line = line.strip()
-                            if not line:
-                                continue
-                                
-                            # 尝试查找年份和期数的组合
-                            if str(year) in line and str(period).zfill(3) in line:
-                                print(f"在二进制读取的文件中找到匹配行: {line}")
+                        # 检查是否包含目标年份和期数的任一格式
+                        for pattern in target_patterns:
+                            if pattern in line:
+                                print(f"在原始文件中使用 {self.source_encoding} 编码找到匹配行: {line}")
                                 return idx
-                    except Exception as e:
-                        print(f"二进制读取文件时出错: {str(e)}")
+                    
+                    # 没有找到完整格式时，尝试查找年份和期数的组合
+                    for idx, line in enumerate(lines):
+                        line = line.strip()
+                        if line and str(year) in line and str(period).zfill(3) in line:
+                            print(f"在原始文件中找到匹配行: {line}")
+                            return idx
             except Exception as e:
                 print(f"从原始文件查找期数时出错: {str(e)}")
             
             # 3. 如果以上方法都失败，我们尝试使用期数作为索引（假设数据按期数排序）
-            if 0 <= period-1 < len(self.data):
+            if 0 <= period-1 < len(self.draws):
                 print(f"使用期数作为索引: {period-1}")
                 return period-1
             
@@ -787,4 +2545,281 @@ class LotteryDataAnalyzer:
                 
         except Exception as e:
             print(f"查找期数索引时出错: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    """数组的只读视图"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class DatasetSnapshot:
+    """某一时刻数据的只读快照
+
+    号码矩阵和派生表都是只读视图：分析器之后追加的数据写在这些行之后或新的缓冲区中，
+    重新导入时替换为新的数组，都不会改变快照看到的内容。没有提供的派生表按区间现场计算。
+    """
+
+    def __init__(self, draws: np.ndarray, zodiac_mapping: Dict, fingerprint: str = None,
+                 count_prefix: np.ndarray = None, features: Dict[str, np.ndarray] = None,
+                 omission: Dict[str, np.ndarray] = None, cooccurrence: Tuple[np.ndarray, np.ndarray] = None,
+                 bitsets: np.ndarray = None):
+        self.draws = None if draws is None else _readonly(draws)
+        self.zodiac_mapping = dict(zodiac_mapping)
+        self.fingerprint = fingerprint
+        self._count_prefix = None if count_prefix is None else _readonly(count_prefix)
+        self._features = None if features is None else {name: _readonly(values) for name, values in features.items()}
+        self._omission = None if omission is None else {name: _readonly(values) for name, values in omission.items()}
+        self._cooccurrence = None if cooccurrence is None else tuple(_readonly(values) for values in cooccurrence)
+        self._bitsets = None if bitsets is None else _readonly(bitsets)
+
+    def get_number_zodiac(self, number: int) -> str:
+        """获取号码对应的生肖"""
+        return self.zodiac_mapping.get(number, "未知")
+
+    def count_range(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """见 LotteryDataAnalyzer.count_range"""
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        end = max(start, end)
+        if self._count_prefix is None:
+            return _count_numbers(self.draws[start:end])
+        per_column = self._count_prefix[end].astype(np.int64) - self._count_prefix[start]
+        return per_column.sum(axis=0), per_column, per_column[6]
+
+    def get_features(self, start: int = 0, end: int = None) -> Dict[str, np.ndarray]:
+        """见 LotteryDataAnalyzer.get_features"""
+        if self._features is None:
+            features = _draw_features(self.draws[start:end])
+            features["zodiac"] = _zodiac_counts(self.draws[start:end], _zodiac_lut(self.zodiac_mapping))
+            return features
+        return {name: values[start:end] for name, values in self._features.items()}
+
+    def get_omission(self, start: int = 0, end: int = None) -> Dict[str, np.ndarray]:
+        """见 LotteryDataAnalyzer.get_omission"""
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        end = max(start, end)
+        if self._omission is not None and start == 0 and end == len(self.draws):
+            return dict(self._omission)
+        return _OmissionTracker(self.draws[start:end]).stats()
+
+    def get_omission_history(self, start: int = 0, end: int = None) -> Dict[str, np.ndarray]:
+        """见 LotteryDataAnalyzer.get_omission_history"""
+        return _omission_history(self.draws[start:end])
+
+    def get_bitsets(self, start: int = 0, end: int = None) -> np.ndarray:
+        """见 LotteryDataAnalyzer.get_bitsets"""
+        if self._bitsets is None:
+            return _draw_bitsets(self.draws[start:end])
+        return self._bitsets[start:end]
+
+    def get_cooccurrence(self, start: int = 0, end: int = None) -> np.ndarray:
+        """见 LotteryDataAnalyzer.get_cooccurrence"""
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        end = max(start, end)
+        if self._cooccurrence is None:
+            return _pair_counts(self.draws[start:end])
+        checkpoints, total = self._cooccurrence
+        return _cooccurrence_range(self.draws, checkpoints, total, start, end)
+
+    def get_consecutive_patterns(self, column: int = 6, start: int = 0, end: int = None,
+                                 zodiac: bool = False) -> Dict:
+        """见 LotteryDataAnalyzer.get_consecutive_patterns"""
+        if self.draws is None or len(self.draws) == 0:
+            return {"错误": "没有数据可分析"}
+        if not 0 <= column < self.draws.shape[1]:
+            return {"错误": f"列号超出范围: {column}"}
+        start, end, _ = slice(start, end).indices(len(self.draws))
+        values = self.draws[start:max(start, end), column]
+        if not zodiac:
+            return LotteryDataAnalyzer._analyze_consecutive_patterns(values)
+        if len(values) == 0:
+            return {"错误": "没有数据可分析"}
+        return _run_patterns(_zodiac_lut(self.zodiac_mapping)[values], ZODIAC_NAMES)
+
+
+def _resolve_range(total: int, num_periods: int = None, start_period: int = None,
+                   end_period: int = None) -> Tuple[int, int]:
+    """把 analyze_data 的期数参数转换为行区间 [start, end)"""
+    start, end = 0, total
+    # 如果指定了期数范围，按范围分析数据
+    if start_period is not None and end_period is not None:
+        if start_period > end_period:
+            start_period, end_period = end_period, start_period
+        if start_period < 0:
+            start_period = 0
+        if end_period > total:
+            end_period = total
+        start, end, _ = slice(start_period, end_period).indices(total)
+    # 如果指定了期数，只分析最近的n期数据
+    elif num_periods is not None and num_periods > 0:
+        start = total - min(num_periods, total)
+    return start, max(start, end)
+
+
+def analyze_snapshot(snapshot: DatasetSnapshot, num_periods: int = None, start_period: int = None,
+                     end_period: int = None) -> Dict:
+    """分析快照中的数据，参数与 LotteryDataAnalyzer.analyze_data 相同
+
+    只读取快照，不修改任何共享状态，可以在多个线程中对同一快照同时分析不同区间。
+    """
+    if snapshot.draws is None:
+        return {"错误": "未加载数据"}
+    
+    start, end = _resolve_range(len(snapshot.draws), num_periods, start_period, end_period)
+    # 分析只读取数据，直接使用号码矩阵的切片（视图，不复制）
+    data_to_analyze = snapshot.draws[start:end]
+        
+    try:
+        analysis = {
+            "基本信息": {
+                "总行数": int(len(data_to_analyze)),
+                "分析时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            },
+            "号码统计": {},
+            "列分析": {},
+            "模式分析": {"特别号码": {}},
+            "生肖分析": {}
+        }
+        
+        # 只有在数据非空时添加数据范围信息
+        if len(data_to_analyze) > 0:
+            try:
+                analysis["基本信息"]["数据范围"] = f"0 - {len(data_to_analyze) - 1}"
+            except:
+                pass
+        
+        # 号码频率分析
+        special_counts = column_counts = None
+        try:
+            # 分析每个号码的出现频率（每列的计数同时用于列分析）
+            number_counts, column_counts, special_counts = snapshot.count_range(start, end)
+            # 键按号码第一次出现的顺序排列，出现次数相同时的排序与逐个累加时一致
+            number_freq = _counts_to_dict(number_counts, _first_occurrence_order(data_to_analyze.ravel()))
+            
+            analysis["号码统计"]["频率"] = number_freq
+        except Exception as e:
+            analysis["号码统计"]["频率"] = {"错误": f"统计号码频率时出错: {str(e)}"}
+        
+        # 生肖频率分析
+        try:
+            zodiac_freq = {}
+            for num, freq in number_freq.items():
+                if isinstance(num, int) and 1 <= num <= 49:
+                    zodiac = snapshot.get_number_zodiac(num)
+                    zodiac_freq[zodiac] = zodiac_freq.get(zodiac, 0) + freq
+            analysis["生肖分析"]["频率"] = zodiac_freq
+        except Exception as e:
+            analysis["生肖分析"]["频率"] = {"错误": f"统计生肖频率时出错: {str(e)}"}
+        
+        # 和值、跨度和尾数分布（由每期特征表直接汇总）
+        features = None
+        try:
+            features = snapshot.get_features(start, end)
+            if len(data_to_analyze) > 0:
+                for key, name in (("和值", "sum"), ("跨度", "span")):
+                    values = features[name]
+                    analysis["号码统计"][key] = {
+                        "平均值": float(round(values.mean(), 2)),
+                        "最小值": int(values.min()),
+                        "最大值": int(values.max())
+                    }
+                tails = features["tails"].sum(axis=0, dtype=np.int64)
+                analysis["号码统计"]["尾数分布"] = {tail: int(tails[tail]) for tail in range(10)}
+        except Exception as e:
+            analysis["号码统计"]["和值"] = {"错误": f"统计和值跨度时出错: {str(e)}"}
+        
+        # 遗漏分析：每个号码的当前遗漏、最大遗漏、平均遗漏和遗漏标准差
+        try:
+            if len(data_to_analyze) > 0:
+                omission = snapshot.get_omission(start, end)
+                analysis["遗漏分析"] = {
+                    num: {
+                        "出现次数": int(omission["hits"][num]),
+                        "当前遗漏": int(omission["current"][num]),
+                        "最大遗漏": int(omission["max"][num]),
+                        "平均遗漏": float(round(omission["mean"][num], 2)),
+                        "遗漏标准差": float(round(omission["std"][num], 2))
+                    }
+                    for num in range(1, 50)
+                }
+            else:
+                analysis["遗漏分析"] = {"信息": "没有数据可分析"}
+        except Exception as e:
+            analysis["遗漏分析"] = {"错误": f"遗漏分析时出错: {str(e)}"}
+        
+        # 列分析
+        try:
+            LotteryDataAnalyzer._analyze_columns(data_to_analyze, analysis, column_counts)
+        except Exception as e:
+            analysis["列分析"] = {"错误": f"列分析时出错: {str(e)}"}
+        
+        # 特别号码分析
+        try:
+            LotteryDataAnalyzer._analyze_special_numbers(data_to_analyze, analysis, special_counts)
+        except Exception as e:
+            analysis["模式分析"]["特别号码"] = {"错误": f"特别号码分析时出错: {str(e)}"}
+        
+        # 号码共现：同期出现次数最多的号码对，以及每个号码最常同时出现的号码
+        try:
+            if len(data_to_analyze) > 0:
+                pairs = snapshot.get_cooccurrence(start, end)
+                upper = np.triu_indices(49, 1)
+                order = np.argsort(-pairs[upper], kind='stable')[:10]
+                analysis["共现分析"] = {
+                    "最常同时出现的号码对": {f"{upper[0][i] + 1}-{upper[1][i] + 1}": int(pairs[upper][i]) for i in order},
+                    "各号码的搭档": {num: dict(partners) for num, partners in _top_partners(pairs, 3).items()}
+                }
+            else:
+                analysis["共现分析"] = {"信息": "没有数据可分析"}
+        except Exception as e:
+            analysis["共现分析"] = {"错误": f"共现分析时出错: {str(e)}"}
+        
+        # 重号、邻号和与最近一期的重叠：由相邻两期号码位集的与运算和计数得到
+        try:
+            bitsets = snapshot.get_bitsets(start, end)
+            if len(bitsets) > 1:
+                previous, current = bitsets[:-1], bitsets[1:]
+                repeats = _popcount(current & previous)
+                neighbours = _popcount(current & _neighbour_mask(previous))
+                for key, name, counts in (("重号分析", "重号", repeats), ("邻号分析", "邻号", neighbours)):
+                    analysis[key] = {
+                        f"平均{name}": float(round(counts.mean(), 2)),
+                        f"最近一期{name}": int(counts[-1]),
+                        f"{name}分布": _count_distribution(counts)
+                    }
+                analysis["重叠分析"] = {
+                    "与最近一期的重叠分布": _count_distribution(_popcount(bitsets[:-1] & bitsets[-1]))
+                }
+            else:
+                for key in ("重号分析", "邻号分析", "重叠分析"):
+                    analysis[key] = {"信息": "数据不足，无法分析"}
+        except Exception as e:
+            for key in ("重号分析", "邻号分析", "重叠分析"):
+                analysis[key] = {"错误": f"重号邻号分析时出错: {str(e)}"}
+        
+        # 各列及特别号码生肖的连续出现模式
+        try:
+            if len(data_to_analyze) > 0:
+                consecutive = {}
+                for col in range(data_to_analyze.shape[1]):
+                    consecutive[f"第{col+1}列"] = snapshot.get_consecutive_patterns(col, start, end)
+                consecutive["特别号码生肖"] = snapshot.get_consecutive_patterns(6, start, end, zodiac=True)
+                analysis["模式分析"]["连续模式"] = consecutive
+            else:
+                analysis["模式分析"]["连续模式"] = {"信息": "没有数据可分析"}
+        except Exception as e:
+            analysis["模式分析"]["连续模式"] = {"错误": f"分析连续模式时出错: {str(e)}"}
+        
+        # 组合模式分析
+        try:
+            LotteryDataAnalyzer._analyze_combinations_for_data(data_to_analyze, analysis, features)
+        except Exception as e:
+            analysis["模式分析"]["组合模式"] = {"错误": f"组合模式分析时出错: {str(e)}"}
+        
+        return analysis
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return {"错误": f"分析过程中出错：{str(e)}"}
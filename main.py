@@ -2,6 +2,7 @@ import sys
 import json
 import os
 import itertools
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, 
                            QWidget, QFileDialog, QTextEdit, QLabel, QMessageBox,
                            QTabWidget, QHBoxLayout, QGridLayout, QComboBox,
@@ -183,6 +184,13 @@ class ZodiacMappingDialog(QDialog):
         """获取当前的生肖映射"""
         return {number: combo.currentText() for number, combo in self.combo_boxes.items()}
 
+def _format_history_hits(histogram):
+    """把 score_candidates 的一行（与各期相同号码个数的分布）格式化为显示文本"""
+    most = max((count for count in range(len(histogram)) if histogram[count]), default=0)
+    return (f"同中3个 {int(histogram[3])}期，同中4个及以上 {int(histogram[4:].sum())}期，"
+            f"最多同中 {most}个")
+
+
 class SmartCombinationDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -319,10 +327,20 @@ class SmartCombinationDialog(QDialog):
                 # 写入统计信息
                 f.write(f"{self.stats_label.text()}\n\n")
                 
+                # 已导入数据时附上每个组合的历史命中情况
+                analyzer = getattr(self.parent(), 'analyzer', None)
+                hits = None
+                if analyzer is not None and analyzer.draws is not None and len(analyzer.draws) > 0:
+                    hits = analyzer.score_candidates(self.valid_combinations)
+                    f.write(f"历史命中: 与已导入的 {len(analyzer.draws)} 期数据逐期比较相同号码的个数\n\n")
+                
                 # 写入组合结果
                 f.write("组合列表:\n")
                 for i, combo in enumerate(self.valid_combinations, 1):
-                    f.write(f"{i}. {' '.join(f'{num:02d}' for num in combo)}\n")
+                    line = f"{i}. {' '.join(f'{num:02d}' for num in combo)}"
+                    if hits is not None:
+                        line += f"  （{_format_history_hits(hits[i - 1])}）"
+                    f.write(line + "\n")
             
             QMessageBox.information(self, "成功", f"组合结果已成功导出到:\n{file_path}")
             
@@ -596,6 +614,14 @@ class LotteryAnalyzer(QMainWindow):
         importAction.triggered.connect(self.import_data)
         fileMenu.addAction(importAction)
         
+        appendAction = QAction('追加新数据', self)
+        appendAction.triggered.connect(self.append_data)
+        fileMenu.addAction(appendAction)
+        
+        mergeAction = QAction('合并导入多个文件', self)
+        mergeAction.triggered.connect(self.import_multiple_data)
+        fileMenu.addAction(mergeAction)
+        
         fileMenu.addSeparator()
         
         exitAction = QAction('退出', self)
@@ -733,6 +759,41 @@ class LotteryAnalyzer(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, '错误', f'导入数据时出错：{str(e)}')
     
+    def import_multiple_data(self):
+        """选择多个数据文件（如按年份保存的文件），合并后一起分析"""
+        file_names, _ = QFileDialog.getOpenFileNames(
+            self, 
+            '选择要合并的数据文件', 
+            '', 
+            '数据文件 (*.xlsx *.txt);;Excel文件 (*.xlsx);;文本文件 (*.txt)'
+        )
+        if file_names:
+            try:
+                success, message = self.analyzer.add_data_files(file_names)
+                if success:
+                    self.analyze_range_btn.setEnabled(True)
+                    self.analyze_all_btn.setEnabled(True)
+                    self.analyze_specific_btn.setEnabled(True)
+                    QMessageBox.information(self, '成功', message)
+                else:
+                    QMessageBox.critical(self, '错误', message)
+            except Exception as e:
+                QMessageBox.critical(self, '错误', f'导入数据时出错：{str(e)}')
+    
+    def append_data(self):
+        """只导入当前数据文件末尾新增的开奖记录"""
+        if self.analyzer.draws is None:
+            QMessageBox.warning(self, '警告', '请先导入数据文件！')
+            return
+        try:
+            success, message = self.analyzer.append_new_data()
+            if success:
+                QMessageBox.information(self, '成功', message)
+            else:
+                QMessageBox.critical(self, '错误', message)
+        except Exception as e:
+            QMessageBox.critical(self, '错误', f'追加数据时出错：{str(e)}')
+    
     def analyze_range_data(self):
         """分析指定期数范围的数据"""
         try:
@@ -847,6 +908,70 @@ class LotteryAnalyzer(QMainWindow):
                 self.analysis_text.append(f"显示出错：{str(e)}")
                 self.analysis_text.append("")
             
+            # 显示和值与跨度
+            try:
+                stats = results.get("号码统计", {})
+                if isinstance(stats.get("和值"), dict) and "平均值" in stats["和值"]:
+                    self.analysis_text.append("<h3>和值与跨度</h3>")
+                    for key in ("和值", "跨度"):
+                        if key in stats:
+                            value = stats[key]
+                            self.analysis_text.append(
+                                f"{key}: 平均 {value['平均值']}，最小 {value['最小值']}，最大 {value['最大值']}")
+                    if "尾数分布" in stats:
+                        tails = "，".join(f"{tail}尾 {count}次" for tail, count in stats["尾数分布"].items())
+                        self.analysis_text.append(f"尾数分布: {tails}")
+                    self.analysis_text.append("")
+            except Exception as e:
+                self.analysis_text.append("<h3>和值与跨度</h3>")
+                self.analysis_text.append(f"显示出错：{str(e)}")
+                self.analysis_text.append("")
+            
+            # 显示遗漏分析：当前遗漏最长的号码
+            try:
+                omission = results.get("遗漏分析", {})
+                if omission and "错误" not in omission and "信息" not in omission:
+                    self.analysis_text.append("<h3>遗漏分析（当前遗漏最长的10个号码）</h3>")
+                    coldest = sorted(omission.items(), key=lambda item: item[1]["当前遗漏"], reverse=True)[:10]
+                    for num, value in coldest:
+                        self.analysis_text.append(
+                            f"号码 {num}: 当前遗漏 {value['当前遗漏']}期，最大遗漏 {value['最大遗漏']}期，"
+                            f"平均遗漏 {value['平均遗漏']}期")
+                    self.analysis_text.append("")
+            except Exception as e:
+                self.analysis_text.append("<h3>遗漏分析</h3>")
+                self.analysis_text.append(f"显示出错：{str(e)}")
+                self.analysis_text.append("")
+            
+            # 显示共现分析：最常同时出现的号码对
+            try:
+                cooccurrence = results.get("共现分析", {})
+                if "最常同时出现的号码对" in cooccurrence:
+                    self.analysis_text.append("<h3>共现分析（最常同时出现的号码对）</h3>")
+                    for pair, count in cooccurrence["最常同时出现的号码对"].items():
+                        self.analysis_text.append(f"号码 {pair}: 同时出现 {count}次")
+                    self.analysis_text.append("")
+            except Exception as e:
+                self.analysis_text.append("<h3>共现分析</h3>")
+                self.analysis_text.append(f"显示出错：{str(e)}")
+                self.analysis_text.append("")
+            
+            # 显示重号与邻号（相对上一期）
+            try:
+                if "平均重号" in results.get("重号分析", {}):
+                    self.analysis_text.append("<h3>重号与邻号</h3>")
+                    for key, name in (("重号分析", "重号"), ("邻号分析", "邻号")):
+                        value = results.get(key, {})
+                        if f"平均{name}" in value:
+                            distribution = "，".join(f"{count}个 {periods}期" for count, periods in value[f"{name}分布"].items())
+                            self.analysis_text.append(
+                                f"{name}: 平均 {value[f'平均{name}']}个，最近一期 {value[f'最近一期{name}']}个（{distribution}）")
+                    self.analysis_text.append("")
+            except Exception as e:
+                self.analysis_text.append("<h3>重号与邻号</h3>")
+                self.analysis_text.append(f"显示出错：{str(e)}")
+                self.analysis_text.append("")
+            
             # 其他分析结果（如果可用）
             try:
                 # 列分析
@@ -937,8 +1062,8 @@ class LotteryAnalyzer(QMainWindow):
             self.prediction_text.append("<h3>预测数据来源</h3>")
             
             # 显示分析数据的文件名
-            if hasattr(self.analyzer, 'last_loaded_file'):
-                file_name = os.path.basename(self.analyzer.last_loaded_file)
+            if self.analyzer.loaded_files:
+                file_name = ', '.join(os.path.basename(path) for path in self.analyzer.loaded_files)
                 self.prediction_text.append(f"数据文件: {file_name}")
             
             # 显示分析数据范围（从基本信息中获取）
@@ -980,6 +1105,9 @@ class LotteryAnalyzer(QMainWindow):
             
             self.prediction_text.append("\n" + "="*50 + "\n")
             
+            # 每组预测号码在全部历史数据中的命中情况（与各期相同号码的个数）
+            hits = self.analyzer.score_candidates(predictions) if predictions else None
+            
             # 显示预测号码
             self.prediction_text.append("<h3>预测号码组合</h3>")
             for i, pred in enumerate(predictions, 1):
@@ -988,6 +1116,7 @@ class LotteryAnalyzer(QMainWindow):
                 special_zodiac = self.analyzer.get_number_zodiac(pred[6])
                 self.prediction_text.append(f'普通号码：{[f"{n:02d}({z})" for n, z in zip(pred[:6], normal_zodiacs)]}')
                 self.prediction_text.append(f'特别号码：{pred[6]:02d}({special_zodiac})')
+                self.prediction_text.append(f'历史命中：{_format_history_hits(hits[i - 1])}')
                 self.prediction_text.append('-' * 30)
             
             # 切换到预测标签页
@@ -1005,7 +1134,7 @@ class LotteryAnalyzer(QMainWindow):
         """分析特定年份和期数的数据"""
         try:
             # 验证是否已加载数据
-            if self.analyzer.data is None:
+            if self.analyzer.draws is None:
                 QMessageBox.warning(self, '警告', '请先导入数据文件！')
                 return
                 
@@ -1023,14 +1152,15 @@ class LotteryAnalyzer(QMainWindow):
             layout = QVBoxLayout()
             
             # 显示已加载的文件信息
-            if hasattr(self.analyzer, 'last_loaded_file'):
-                file_info = QLabel(f"当前加载文件: {os.path.basename(self.analyzer.last_loaded_file)}")
+            if self.analyzer.loaded_files:
+                file_names = ', '.join(os.path.basename(path) for path in self.analyzer.loaded_files)
+                file_info = QLabel(f"当前加载文件: {file_names}")
                 file_info.setStyleSheet("color: blue;")
                 layout.addWidget(file_info)
                 
                 # 显示数据行数信息
-                if self.analyzer.data is not None:
-                    rows_info = QLabel(f"数据行数: {len(self.analyzer.data)}")
+                if self.analyzer.draws is not None:
+                    rows_info = QLabel(f"数据行数: {len(self.analyzer.draws)}")
                     rows_info.setStyleSheet("color: blue;")
                     layout.addWidget(rows_info)
             
@@ -1159,7 +1289,7 @@ class LotteryAnalyzer(QMainWindow):
                     
                     # 计算起始和结束期数索引
                     start_index = max(0, period_index - backward)  # 确保不小于0
-                    end_index = min(len(self.analyzer.data), period_index + forward + 1)  # 确保不超过数据范围
+                    end_index = min(len(self.analyzer.draws), period_index + forward + 1)  # 确保不超过数据范围
                     
                     # 显示正在分析的提示
                     self.analysis_text.append(f"找到期数索引: {period_index}")
@@ -1264,6 +1394,8 @@ class LotteryAnalyzer(QMainWindow):
             self.statusBar().showMessage(f"序列号状态: {message}", 5000)
 
 if __name__ == '__main__':
+    # 打包后的程序启动多进程解析的工作进程时需要
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     
     # 设置默认字体
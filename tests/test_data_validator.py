@@ -0,0 +1,690 @@
+"""data_validator 的解析与分析一致性测试
+
+运行：python -m pytest -q tests
+"""
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_validator as dv  # noqa: E402
+
+
+def _sample_lines(count, seed=0, messy=True):
+    """生成带期号、日期、各种分隔标记和冒号的数据行；messy 时混入无法解析和规则特殊的行"""
+    rnd = random.Random(seed)
+    lines = []
+    year, period = 2005, 0
+    for _ in range(count):
+        period += 1
+        if period > 150:
+            year, period = year + 1, 1
+        nums = rnd.sample(range(1, 50), 7)
+        body = '-'.join(f"{x:02d}" for x in nums[:6])
+        month, day = rnd.randint(1, 12), rnd.randint(1, 28)
+        styles = [
+            f"{year}年{period:03d}期:{month:02d}月{day:02d}日:{body}特{nums[6]:02d}",
+            f"{year}年{period:03d}期:{body}+{nums[6]}",
+            f"{year}/{period:03d}:{body}|{nums[6]}",
+            f"  {year}年{period:03d}期:{month}月{day}日:{body} 特 {nums[6]}  ",
+        ]
+        if messy:
+            styles += [
+                f"{' '.join(map(str, nums[:6]))} / {nums[6]}",
+                f"{year}-{period}:x:{body}\\{nums[6]} 22",
+                ",".join(map(str, nums)) + ",50,0",
+                f"{body}特{nums[6]}特3",  # 标记出现两次，退回取全部数字
+                f"{body}特 ",  # 标记后没有数字
+                f"{body}+0 {nums[6]} 9",
+                rnd.choice(["", "short", "# comment line here", "00000123456789 55 66", "1 2 3"]),
+            ]
+        lines.append(rnd.choice(styles))
+    return lines
+
+
+def _write_lines(path, lines, newline='\n'):
+    with open(path, 'wb') as f:
+        f.write((newline.join(lines) + newline).encode('utf-8'))
+
+
+def _load(path, cache=False):
+    analyzer = dv.LotteryDataAnalyzer()
+    analyzer.use_sidecar_cache = cache
+    success, message = analyzer.load_data(str(path))
+    assert success, message
+    return analyzer
+
+
+def _expected_rows(content):
+    """逐行解析（文本模式的换行规则）得到的号码"""
+    rows = map(dv._parse_draw_line, re.split(r'\r\n|\r|\n', content))
+    return [row for row in rows if row is not None]
+
+
+@pytest.mark.parametrize("newline", ['\n', '\r\n', '\r'])
+def test_tokenizer_matches_line_parser(newline):
+    content = newline.join(_sample_lines(3000, seed=len(newline)))
+
+    draws, meta = dv._tokenize_draw_bytes(content.encode('utf-8'))
+    assert draws.tolist() == _expected_rows(content)
+    assert all(len(values) == len(draws) for values in meta.values())
+
+
+def test_tokenizer_reads_period_and_date():
+    content = "2015年034期:03月27日:01-02-03-04-05-06特07\n008期:09-10-11-12-13-14+15\n16 17 18 19 20 21 / 22\n"
+    draws, meta = dv._tokenize_draw_bytes(content.encode('utf-8'))
+    assert draws.tolist() == _expected_rows(content)
+    assert {name: meta[name].tolist() for name in dv.META_FIELDS} == {
+        "year": [2015, 0, 0], "period": [34, 8, 0], "month": [3, 0, 0], "day": [27, 0, 0]}
+
+
+def test_sidecar_round_trip(tmp_path, capsys):
+    path = tmp_path / "draws.txt"
+    _write_lines(path, _sample_lines(2000, seed=2))
+    parsed = _load(path).data.to_numpy()
+
+    _load(path, cache=True)
+    assert os.path.isdir(dv._sidecar_dir(str(path)))
+    capsys.readouterr()
+    cached = _load(path, cache=True)
+    assert "从缓存加载" in capsys.readouterr().out
+    assert np.array_equal(cached.data.to_numpy(), parsed)
+
+    # 源文件内容变化后缓存失效，重新解析
+    _write_lines(path, _sample_lines(2000, seed=3))
+    capsys.readouterr()
+    reloaded = _load(path, cache=True)
+    assert "从缓存加载" not in capsys.readouterr().out
+    assert np.array_equal(reloaded.data.to_numpy(), _load(path).data.to_numpy())
+
+
+def _append_lines(path, lines):
+    with open(path, 'ab') as f:
+        f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+def _assert_same_data(analyzer, expected):
+    assert np.array_equal(analyzer.draws, expected.draws)
+    for name in dv.META_FIELDS:
+        assert np.array_equal(analyzer.meta[name], expected.meta[name])
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_append_matches_full_reload(tmp_path, capsys, cache):
+    lines = _sample_lines(2000, seed=5, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:1500])
+    analyzer = _load(path, cache=cache)
+
+    _append_lines(path, lines[1500:])
+    capsys.readouterr()
+    success, message = analyzer.append_new_data()
+    assert success, message
+    assert "追加了 500 行新数据" in capsys.readouterr().out
+
+    reloaded = _load(path)
+    _assert_same_data(analyzer, reloaded)
+    assert analyzer.source_text == reloaded.source_text
+    if cache:
+        # 追加后的缓存与重新解析的结果一致
+        _assert_same_data(_load(path, cache=True), reloaded)
+        assert "从缓存加载" in capsys.readouterr().out
+
+
+def test_append_keeps_repeated_and_yearless_periods(tmp_path, capsys):
+    lines, _ = _period_lines(2024, range(1, 51), seed=11)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines)
+    analyzer = _load(path, cache=True)
+
+    # 重新贴出的第50期、新的第51期，以及没有年份的一行
+    reposted, _ = _period_lines(2024, [50, 51], seed=12)
+    yearless, _ = _period_lines(0, [52], seed=13)
+    _append_lines(path, reposted + yearless)
+    success, message = analyzer.append_new_data()
+    assert success, message
+    assert len(analyzer.draws) == 53
+
+    parsed = _load(path)
+    _assert_same_data(analyzer, parsed)
+    capsys.readouterr()
+    cached = _load(path, cache=True)
+    assert "从缓存加载" in capsys.readouterr().out
+    _assert_same_data(cached, parsed)
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_streamed_load_matches_whole_buffer(tmp_path, monkeypatch, cache):
+    path = tmp_path / "draws.txt"
+    _write_lines(path, _sample_lines(20000, seed=7), newline='\r\n')
+    expected = _load(path)
+
+    chunks = list(dv.iter_draw_chunks(str(path), chunk_bytes=64 << 10))
+    assert len(chunks) > 1
+    assert np.array_equal(np.concatenate([draws for draws, _ in chunks]), expected.draws)
+    for name in dv.META_FIELDS:
+        assert np.array_equal(np.concatenate([meta[name] for _, meta in chunks]), expected.meta[name])
+
+    monkeypatch.setattr(dv, "STREAM_THRESHOLD_BYTES", 1)
+    monkeypatch.setattr(dv, "STREAM_CHUNK_BYTES", 64 << 10)
+    _assert_same_data(_load(path, cache=cache), expected)
+
+
+def test_parallel_chunks_match_serial(tmp_path):
+    path = tmp_path / "draws.txt"
+    _write_lines(path, _sample_lines(20000, seed=3), newline='\r\n')
+
+    serial = list(dv.iter_draw_chunks(str(path), 'utf-8', chunk_bytes=64 << 10))
+    parallel = list(dv.iter_draw_chunks_parallel(str(path), 'utf-8', workers=2, chunk_bytes=64 << 10))
+    assert np.array_equal(np.concatenate([draws for draws, _ in serial]),
+                          np.concatenate([draws for draws, _ in parallel]))
+    for name in dv.META_FIELDS:
+        assert np.array_equal(np.concatenate([meta[name] for _, meta in serial]),
+                              np.concatenate([meta[name] for _, meta in parallel]))
+
+    analyzer = dv.LotteryDataAnalyzer()
+    analyzer.use_sidecar_cache = False
+    analyzer.parallel_threshold = 1
+    analyzer.parallel_workers = 2
+    assert analyzer.load_data(str(path))[0]
+    _assert_same_data(analyzer, _load(path))
+
+
+def _write_workbook(path, header, rows, date1904=False):
+    from openpyxl import Workbook
+    from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+    workbook = Workbook()
+    if date1904:
+        workbook.epoch = CALENDAR_MAC_1904
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+@pytest.mark.parametrize("date1904", [False, True])
+def test_excel_period_and_date_columns(tmp_path, date1904):
+    rnd = random.Random(9)
+    numbers = [rnd.sample(range(1, 50), 7) for _ in range(300)]
+    first_day = datetime(2024, 1, 1)
+    base = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+    rows = []
+    for i, row in enumerate(numbers):
+        day = first_day + timedelta(days=i)
+        # 日期单元格一半为日期格式，一半为未设置格式的日期序号
+        date = day if i % 2 else float((day - base).days)
+        rows.append([f"2024{i + 1:03d}", date] + row + ["备注"])
+    path = tmp_path / "draws.xlsx"
+    _write_workbook(path, ["期号", "开奖日期", "n1", "n2", "n3", "n4", "n5", "n6", "特码", "备注"], rows, date1904)
+
+    analyzer = _load(path)
+    assert analyzer.draws.tolist() == numbers
+    assert analyzer.column_labels == ["n1", "n2", "n3", "n4", "n5", "n6", "特码"]
+    assert analyzer.meta["year"].tolist() == [2024] * len(numbers)
+    assert analyzer.meta["period"].tolist() == list(range(1, len(numbers) + 1))
+    days = [first_day + timedelta(days=i) for i in range(len(numbers))]
+    assert analyzer.meta["month"].tolist() == [day.month for day in days]
+    assert analyzer.meta["day"].tolist() == [day.day for day in days]
+    assert analyzer.find_period_index(2024, 5) == 4
+
+
+def test_excel_plain_columns(tmp_path):
+    rnd = random.Random(10)
+    numbers = [rnd.sample(range(1, 50), 7) for _ in range(200)]
+    path = tmp_path / "draws.xlsx"
+    _write_workbook(path, [1, 2, 3, 4, 5, 6, 7], numbers)
+
+    analyzer = _load(path)
+    assert analyzer.draws.tolist() == numbers
+    assert analyzer.column_labels == [1, 2, 3, 4, 5, 6, 7]
+    assert not analyzer.meta["period"].any()
+
+
+def _period_lines(year, periods, seed):
+    rnd = random.Random(seed)
+    lines, rows = [], []
+    for period in periods:
+        nums = rnd.sample(range(1, 50), 7)
+        prefix = f"{year}年{period:03d}期" if year else f"{period:03d}期"
+        lines.append(f"{prefix}:01月03日:{'-'.join(map(str, nums[:6]))}特{nums[6]}")
+        rows.append(nums)
+    return lines, rows
+
+
+def test_merge_files_by_period(tmp_path):
+    lines_2023, rows_2023 = _period_lines(2023, range(1, 101), seed=1)
+    lines_2022, rows_2022 = _period_lines(2022, range(1, 151), seed=2)
+    repeated, _ = _period_lines(2023, range(1, 11), seed=3)
+    first, second = tmp_path / "2023.txt", tmp_path / "2022.txt"
+    _write_lines(first, lines_2023)
+    _write_lines(second, lines_2022 + repeated)
+
+    analyzer = dv.LotteryDataAnalyzer()
+    analyzer.use_sidecar_cache = False
+    success, message = analyzer.add_data_files([str(first), str(second)])
+    assert success, message
+    assert "去除重复期号 10 行" in message
+    # 按 (年份, 期号) 排序，重复的期保留先登记的文件中的行
+    assert analyzer.draws.tolist() == rows_2022 + rows_2023
+    assert analyzer.meta["year"].tolist() == [2022] * 150 + [2023] * 100
+
+    more_lines, more_rows = _period_lines(2023, range(101, 111), seed=4)
+    _append_lines(first, more_lines)
+    success, message = analyzer.refresh_catalog()
+    assert success, message
+    assert analyzer.draws.tolist() == rows_2022 + rows_2023 + more_rows
+
+    success, message = analyzer.remove_data_file(str(second))
+    assert success, message
+    assert analyzer.draws.tolist() == rows_2023 + more_rows
+
+
+def test_merge_files_without_year(tmp_path):
+    # 按年份拆分的文件只写期号时，各文件的期号相同，不能当作重复的期
+    lines_a, rows_a = _period_lines(0, range(1, 101), seed=5)
+    lines_b, rows_b = _period_lines(0, range(1, 101), seed=6)
+    lines_c, rows_c = _period_lines(2024, range(1, 21), seed=7)
+    repeated, _ = _period_lines(2024, range(1, 6), seed=8)
+    paths = [tmp_path / name for name in ("a.txt", "b.txt", "c.txt", "d.txt")]
+    for path, lines in zip(paths, (lines_a, lines_b, lines_c, repeated)):
+        _write_lines(path, lines)
+
+    analyzer = dv.LotteryDataAnalyzer()
+    analyzer.use_sidecar_cache = False
+    success, message = analyzer.add_data_files([str(path) for path in paths[:2]])
+    assert success, message
+    assert "去除重复期号" not in message
+    assert analyzer.draws.tolist() == rows_a + rows_b
+
+    # 有年份的行仍按 (年份, 期号) 去重，没有年份的行保持登记顺序
+    success, message = analyzer.add_data_files([str(path) for path in paths[2:]])
+    assert success, message
+    assert "去除重复期号 5 行" in message
+    assert analyzer.draws.tolist() == rows_a + rows_b + rows_c
+
+
+def _random_draws(count, seed):
+    rng = np.random.default_rng(seed)
+    return np.array([rng.choice(np.arange(1, 50), 7, replace=False) for _ in range(count)])
+
+
+def _analyzer_with(draws):
+    analyzer = dv.LotteryDataAnalyzer()
+    analyzer.data = pd.DataFrame(draws)
+    return analyzer
+
+
+RANGES = [(0, None), (0, 1), (17, 333), (250, 251), (400, 400), (-100, None)]
+
+
+@pytest.mark.parametrize("table_limit", [None, 0])
+def test_count_range_matches_bincount(monkeypatch, table_limit):
+    if table_limit is not None:
+        # 超过前缀计数表的内存上限时按区间直接统计
+        monkeypatch.setattr(dv, "PREFIX_TABLE_MAX_BYTES", table_limit)
+    draws = _random_draws(500, seed=12)
+    analyzer = _analyzer_with(draws)
+    for start, end in RANGES:
+        part = draws[start:end]
+        total, per_column, special = analyzer.count_range(start, end)
+        assert total[1:50].tolist() == np.bincount(part.ravel(), minlength=50)[1:50].tolist()
+        for col in range(7):
+            assert per_column[col][1:50].tolist() == np.bincount(part[:, col], minlength=50)[1:50].tolist()
+        assert special[1:50].tolist() == np.bincount(part[:, 6], minlength=50)[1:50].tolist()
+
+
+def test_count_range_after_append(tmp_path):
+    lines = _sample_lines(1200, seed=13, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:1000])
+    analyzer = _load(path)
+    analyzer.count_range(0, None)
+    _append_lines(path, lines[1000:])
+    assert analyzer.append_new_data()[0]
+
+    reloaded = _load(path)
+    for start, end in RANGES + [(900, 1100)]:
+        for ours, expected in zip(analyzer.count_range(start, end), reloaded.count_range(start, end)):
+            assert np.array_equal(ours, expected)
+
+
+def _zodiac_mapping(shift=0):
+    return {number: dv.ZODIAC_NAMES[(number + shift) % 12] for number in range(1, 50)}
+
+
+def test_features_match_brute_force(tmp_path):
+    lines = _sample_lines(1200, seed=14, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:1000])
+    analyzer = _load(path)
+    analyzer.zodiac_mapping = _zodiac_mapping()
+    analyzer.get_features()
+    _append_lines(path, lines[1000:])
+    assert analyzer.append_new_data()[0]
+    analyzer.zodiac_mapping = _zodiac_mapping(shift=5)
+
+    draws = analyzer.draws.astype(np.int64)
+    features = analyzer.get_features()
+    assert features["sum"].tolist() == draws.sum(axis=1).tolist()
+    assert features["span"].tolist() == (draws.max(axis=1) - draws.min(axis=1)).tolist()
+    assert features["odd"].tolist() == (draws % 2).sum(axis=1).tolist()
+    assert features["big"].tolist() == (draws > 25).sum(axis=1).tolist()
+    zones = np.minimum((draws - 1) // 10, 4)
+    assert features["zones"].tolist() == [np.bincount(row, minlength=5).tolist() for row in zones]
+    assert features["tails"].tolist() == [np.bincount(row % 10, minlength=10).tolist() for row in draws]
+    mapping = _zodiac_mapping(shift=5)
+    zodiac = [[dv.ZODIAC_NAMES.index(mapping[n]) for n in row] for row in draws.tolist()]
+    assert features["zodiac"].tolist() == [np.bincount(row, minlength=len(dv.ZODIAC_NAMES)).tolist()
+                                           for row in zodiac]
+    assert features["sum"][100:200].tolist() == analyzer.get_features(100, 200)["sum"].tolist()
+
+
+def _brute_force_omission(draws):
+    """逐个号码按出现的行计算遗漏（下标即号码）"""
+    rows = len(draws)
+    stats = {key: np.zeros(50) for key in ("hits", "current", "max", "mean", "std")}
+    for number in range(1, 50):
+        hits = [row for row in range(rows) if number in draws[row]]
+        gaps = np.diff(hits) - 1 if len(hits) > 1 else np.array([])
+        current = rows - 1 - hits[-1] if hits else rows
+        leading = hits[0] if hits else rows
+        stats["hits"][number] = len(hits)
+        stats["current"][number] = current
+        stats["max"][number] = max([current, leading] + gaps.tolist())
+        stats["mean"][number] = gaps.mean() if len(gaps) else 0
+        stats["std"][number] = gaps.std() if len(gaps) else 0
+    return stats
+
+
+def _assert_omission(stats, expected):
+    for key, values in expected.items():
+        assert np.allclose(stats[key][1:50], values[1:50]), key
+
+
+def test_omission_matches_brute_force(tmp_path, monkeypatch):
+    monkeypatch.setattr(dv, "OMISSION_REBUILD_ROWS", 100)
+    lines = _sample_lines(1300, seed=15, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:1000])
+    analyzer = _load(path)
+    analyzer.get_omission()
+    # 少量追加逐期更新，超过 OMISSION_REBUILD_ROWS 行时重新统计
+    _append_lines(path, lines[1000:1010])
+    assert analyzer.append_new_data()[0]
+    _append_lines(path, lines[1010:])
+    assert analyzer.append_new_data()[0]
+
+    draws = analyzer.draws.tolist()
+    _assert_omission(analyzer.get_omission(), _brute_force_omission(draws))
+    _assert_omission(analyzer.get_omission(200, 260), _brute_force_omission(draws[200:260]))
+
+
+def test_rolling_analysis_matches_windows():
+    draws = _random_draws(300, seed=17)
+    analyzer = _analyzer_with(draws)
+    result = analyzer.rolling_analysis(30, start=10, end=290, step=7)
+    starts = list(range(10, 290 - 30 + 1, 7))
+    assert result["starts"].tolist() == starts
+    for i, start in enumerate(starts):
+        window = draws[start:start + 30]
+        assert result["counts"][i].tolist() == np.bincount(window.ravel(), minlength=50)[1:50].tolist()
+        assert result["odd"][i] == (window % 2).sum()
+        assert result["big"][i] == (window > 25).sum()
+    assert "错误" in analyzer.rolling_analysis(0)
+
+
+def test_analysis_cache_invalidation(tmp_path, monkeypatch):
+    lines = _sample_lines(600, seed=18, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:500])
+    analyzer = _load(path)
+    analyzer.cache_size = 2
+
+    def analyze(*args):
+        results = analyzer.analyze_data(*args)
+        return results["基本信息"]["缓存命中"], results
+
+    assert analyze()[0] is False
+    hit, results = analyze()
+    assert hit is True and results["基本信息"]["总行数"] == 500
+
+    # 追加数据后重新计算
+    _append_lines(path, lines[500:])
+    assert analyzer.append_new_data()[0]
+    hit, results = analyze()
+    assert hit is False and results["基本信息"]["总行数"] == 600
+    assert analyze()[0] is True
+
+    # 修改生肖映射后重新计算（映射文件写入临时目录）
+    monkeypatch.chdir(tmp_path)
+    assert analyzer.set_zodiac_mapping(_zodiac_mapping(shift=3))
+    assert analyze()[0] is False
+    assert analyze()[0] is True
+
+    # 超过容量时丢弃最久未使用的结果
+    assert analyze(100)[0] is False
+    assert analyze(200)[0] is False
+    assert analyze(100)[0] is True
+    assert analyze()[0] is False
+
+
+def test_snapshot_is_not_affected_by_append(tmp_path):
+    lines = _sample_lines(600, seed=19, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:500])
+    analyzer = _load(path)
+    snapshot = analyzer.snapshot()
+    before = dv.analyze_snapshot(snapshot, 100)
+
+    _append_lines(path, lines[500:])
+    assert analyzer.append_new_data()[0]
+    assert len(snapshot.draws) == 500
+    after = dv.analyze_snapshot(snapshot, 100)
+    for results in (before, after):
+        results["基本信息"].pop("分析时间")
+    assert after == before
+    assert snapshot.count_range(0, None)[0].sum() == 500 * 7
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("from_cache", [False, True])
+def test_analyze_ranges_matches_count_range(tmp_path, monkeypatch, workers, from_cache):
+    monkeypatch.setattr(dv, "BATCH_TASK_RANGES", 4)
+    if from_cache:
+        # 工作进程通过解析缓存的内存映射读取号码矩阵
+        path = tmp_path / "draws.txt"
+        _write_lines(path, _sample_lines(400, seed=20, messy=False))
+        _load(path, cache=True)
+        analyzer = _load(path, cache=True)
+    else:
+        analyzer = _analyzer_with(_random_draws(400, seed=20))
+    draws = analyzer.draws.astype(np.int64)
+    ranges = [(None, None), (1, 50), (10, 400), (200, None), (None, 30), (399, 399), (5, 6)] * 3
+
+    result = analyzer.analyze_ranges(ranges, workers=workers)
+    assert len(result["ranges"]) == len(ranges)
+    for i, (start, end) in enumerate(result["ranges"].tolist()):
+        part = draws[start:end]
+        assert result["rows"][i] == len(part)
+        total, _, special = analyzer.count_range(start, end)
+        assert result["counts"][i].tolist() == total[1:50].tolist()
+        assert result["special"][i].tolist() == special[1:50].tolist()
+        assert np.isclose(result["sum_mean"][i], part.sum(axis=1).mean() if len(part) else 0)
+        assert result["odd"][i] == (part % 2).sum()
+        assert result["big"][i] == (part > 25).sum()
+
+
+def _brute_force_pairs(draws):
+    onehot = np.zeros((len(draws), 50), dtype=np.int64)
+    for row, numbers in enumerate(draws):
+        onehot[row, numbers] = 1
+    return onehot[:, 1:].T @ onehot[:, 1:]
+
+
+def test_cooccurrence_matches_brute_force(tmp_path, monkeypatch):
+    monkeypatch.setattr(dv, "COOCCURRENCE_BLOCK_ROWS", 64)
+    monkeypatch.setattr(dv, "COOCCURRENCE_DIRECT_ROWS", 8)
+    lines = _sample_lines(800, seed=23, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:500])
+    analyzer = _load(path)
+    analyzer.get_cooccurrence()
+    # 少量追加逐期更新，较多时分块累加并补充检查点
+    _append_lines(path, lines[500:505])
+    assert analyzer.append_new_data()[0]
+    _append_lines(path, lines[505:])
+    assert analyzer.append_new_data()[0]
+
+    draws = analyzer.draws.tolist()
+    for start, end in RANGES + [(60, 700), (63, 65), (500, 800)]:
+        assert np.array_equal(analyzer.get_cooccurrence(start, end), _brute_force_pairs(draws[start:end]))
+
+    pairs = _brute_force_pairs(draws)
+    top = analyzer.top_pairs(3)
+    for number, partners in top.items():
+        counts = [count for _, count in partners]
+        row = np.delete(pairs[number - 1], number - 1)
+        assert counts == sorted(row.tolist(), reverse=True)[:3]
+        assert all(pairs[number - 1, other - 1] == count for other, count in partners)
+
+
+def test_bitsets_match_brute_force(tmp_path):
+    lines = _sample_lines(700, seed=24, messy=False)
+    path = tmp_path / "draws.txt"
+    _write_lines(path, lines[:600])
+    analyzer = _load(path)
+    analyzer.get_bitsets()
+    _append_lines(path, lines[600:])
+    assert analyzer.append_new_data()[0]
+
+    draws = [set(row) for row in analyzer.draws.tolist()]
+    assert analyzer.get_bitsets().tolist() == [sum(1 << n for n in row) for row in draws]
+    numbers = [3, 17, 25, 31, 42, 49]
+    assert analyzer.overlap_counts(numbers, 100, 300).tolist() == [len(row & set(numbers)) for row in draws[100:300]]
+
+    expected = [row for row, numbers_in_row in enumerate(draws)
+                if {5, 9} <= numbers_in_row and not numbers_in_row & {1, 2}
+                and len(numbers_in_row & {10, 20, 30, 40}) >= 1]
+    assert analyzer.filter_draws(include=[5, 9], exclude=[1, 2], min_hits=1,
+                                 hits_from=[10, 20, 30, 40]).tolist() == expected
+    in_range = analyzer.filter_draws(include=[7], start=50, end=400).tolist()
+    assert in_range == [row for row in range(50, 400) if 7 in draws[row]]
+
+
+def test_similar_draws_and_candidate_scores(monkeypatch):
+    # 小的分块上限使候选号码分多块统计
+    monkeypatch.setattr(dv, "SIMILAR_BLOCK_CELLS", 1000)
+    draws = _random_draws(600, seed=25)
+    analyzer = _analyzer_with(draws)
+    rows = [set(row) for row in draws.tolist()]
+
+    numbers = draws[123].tolist()
+    found, overlaps = analyzer.find_similar_draws(numbers, min_overlap=3, start=20, end=580)
+    expected = sorted(((len(rows[row] & set(numbers)), row) for row in range(20, 580)
+                       if len(rows[row] & set(numbers)) >= 3), key=lambda item: (-item[0], -item[1]))
+    assert list(zip(overlaps.tolist(), found.tolist())) == expected
+    assert found[0] == 123 and overlaps[0] == 7
+
+    candidates = [draws[i].tolist()[:6] for i in range(0, 600, 7)]
+    scores = analyzer.score_candidates(candidates, 100, 500)
+    assert scores.shape == (len(candidates), 8)
+    for candidate, histogram in zip(candidates, scores.tolist()):
+        counts = [len(row & set(candidate)) for row in rows[100:500]]
+        assert histogram == np.bincount(counts, minlength=8).tolist()
+
+
+def test_methods_without_data():
+    analyzer = dv.LotteryDataAnalyzer()
+    calls = {
+        "get_bitsets": lambda: analyzer.get_bitsets(),
+        "overlap_counts": lambda: analyzer.overlap_counts([1, 2, 3]),
+        "find_similar_draws": lambda: analyzer.find_similar_draws([1, 2, 3]),
+        "score_candidates": lambda: analyzer.score_candidates([[1, 2, 3, 4, 5, 6]]),
+        "filter_draws": lambda: analyzer.filter_draws(include=[1]),
+        "get_cooccurrence": lambda: analyzer.get_cooccurrence(),
+        "top_pairs": lambda: analyzer.top_pairs(),
+        "count_range": lambda: analyzer.count_range(0, 10),
+        "get_omission": lambda: analyzer.get_omission(),
+        "get_omission_history": lambda: analyzer.get_omission_history(),
+        "get_features": lambda: analyzer.get_features(),
+    }
+    for name, call in calls.items():
+        assert call() == {"错误": "未加载数据"}, name
+
+
+@pytest.mark.parametrize("rows", [
+    [[99, 2, 3, 4, 5, 6, 7], [7, 8, 9, 10, 11, 12, 13]],
+    [[1, 2, 3, 4, 5, 6, 200], [7, 8, 9, 10, 11, 12, 13], [0, 8, 9, 10, 11, 12, 255]],
+])
+def test_analyze_data_with_out_of_range_values(rows):
+    analyzer = _analyzer_with(rows)
+    results = analyzer.analyze_data()
+
+    assert "错误" not in results
+    assert all(not isinstance(section, dict) or "错误" not in section for section in results.values())
+    values = [value for row in rows for value in row]
+    frequency = {int(number): count for number, count in results["号码统计"]["频率"].items()}
+    assert frequency == {value: values.count(value) for value in set(values)}
+
+    total, per_column, special = analyzer.count_range(0, None)
+    assert len(total) > max(values)
+    for col in range(7):
+        column = [row[col] for row in rows]
+        assert [int(per_column[col][value]) for value in column] == [column.count(value) for value in column]
+    assert analyzer.validate_data()[0] is False
+
+
+def test_excel_formula_without_cached_value(tmp_path):
+    # openpyxl 保存公式时不写入计算结果，读取到的是空值
+    rows = [[i + 1, i + 2, i + 3, i + 4, i + 5, i + 6, f"=A{i + 2}+10"] for i in range(5)]
+    path = tmp_path / "draws.xlsx"
+    _write_workbook(path, list("abcdefg"), rows)
+
+    analyzer = _load(path)
+    assert analyzer.draws[:, :6].tolist() == [row[:6] for row in rows]
+    assert not analyzer.draws[:, 6].any()
+    assert analyzer.validate_data() == (False, ["第7列包含超出范围(1-49)的数值"])
+
+
+def test_omission_history_matches_prefixes(monkeypatch):
+    # 小的分块使块之间的状态传递也被覆盖
+    monkeypatch.setattr(dv, "FEATURE_CHUNK_ROWS", 16)
+    draws = _random_draws(120, seed=26)
+    draws[5, 3] = 0
+    draws[9, 6] = 200
+    analyzer = _analyzer_with(draws)
+
+    history = analyzer.get_omission_history(10, 110)
+    assert history["current"].shape == (100, 49)
+    for k in range(100):
+        expected = analyzer.get_omission(10, 11 + k)
+        for key in ("current", "max", "mean", "std"):
+            assert np.allclose(history[key][k], expected[key][1:50], atol=1e-4), (k, key)
+    assert analyzer.get_omission_history(50, 50)["max"].shape == (0, 49)
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "gbk"])
+def test_source_text_decodes_retained_bytes(tmp_path, encoding):
+    content = "\n".join(_sample_lines(300, seed=27, messy=False)) + "\n"
+    path = tmp_path / "draws.txt"
+    path.write_bytes(content.encode(encoding))
+
+    analyzer = _load(path)
+    assert analyzer.source_encoding == encoding
+    assert analyzer.source_text == content
+    assert not any(isinstance(value, str) and len(value) > 1000 for value in vars(analyzer).values())
+
+    more = _sample_lines(310, seed=27, messy=False)[300:]
+    with open(path, 'ab') as f:
+        f.write(("\n".join(more) + "\n").encode(encoding.replace("-sig", "")))
+    assert analyzer.append_new_data()[0]
+    assert analyzer.source_text == content + "\n".join(more) + "\n"